@@ -0,0 +1,108 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+from posts.paginator import POSTS_PER_PAGE
+
+User = get_user_model()
+
+
+# Ленты и поисковый индекс обновляются фоновыми задачами.
+@override_settings(JOBS_EAGER=True)
+class ApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.posts = [
+            Post.objects.create(text=f'Пост {i}', author=cls.author,
+                                group=cls.group if i % 2 else None)
+            for i in range(POSTS_PER_PAGE + 3)]
+        Comment.objects.create(post=cls.posts[0], author=cls.reader,
+                               text='Комментарий')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_feeds(self):
+        """Ленты отдают первую страницу постов и курсор следующей"""
+        urls = {
+            reverse('api:index'): (POSTS_PER_PAGE, True),
+            reverse('api:group', args=['group']): (len(self.posts) // 2,
+                                                   False),
+            reverse('api:profile', args=['author']): (POSTS_PER_PAGE, True),
+        }
+        for url, (count, has_next) in urls.items():
+            with self.subTest(url=url):
+                data = self.client.get(url).json()
+                self.assertEqual(len(data['results']), count)
+                self.assertEqual(data['next'] is not None, has_next)
+                self.assertIsNone(data['previous'])
+
+    def test_follow_feed(self):
+        """Лента подписок доступна только авторизованным"""
+        url = reverse('api:follow_index')
+        self.assertEqual(self.client.get(url).status_code, 401)
+        data = self.reader_client.get(url).json()
+        self.assertEqual(data['results'][0]['id'], self.posts[-1].id)
+
+    def test_post_fields(self):
+        """Пост отдаётся с нужными клиенту полями и комментариями"""
+        post = self.posts[0]
+        data = self.client.get(reverse('api:post', args=[post.id])).json()
+        self.assertEqual(data['author'], 'author')
+        self.assertIsNone(data['group'])
+        self.assertEqual(data['comments_count'], 1)
+        self.assertEqual(data['comments'][0]['text'], 'Комментарий')
+        self.assertIsNone(data['comments_next'])
+
+    def test_cursor_walks_the_feed(self):
+        """По курсору next можно пройти всю ленту"""
+        url = reverse('api:index')
+        first = self.client.get(url).json()
+        second = self.client.get(url, {'after': first['next']}).json()
+        ids = [post['id'] for post in first['results'] + second['results']]
+        self.assertEqual(ids, [post.id for post in reversed(self.posts)])
+
+    def test_conditional_get(self):
+        """Неизменившаяся лента отдаёт 304, изменившаяся — новое тело"""
+        url = reverse('api:index')
+        response = self.client.get(url)
+        self.assertNotIn('Last-Modified', response)
+        etag = response['ETag']
+
+        cached = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b'')
+
+        Post.objects.create(text='Новый пост', author=self.author)
+        fresh = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(fresh.status_code, 200)
+        self.assertNotEqual(fresh['ETag'], etag)
+
+    def test_validators_follow_changes(self):
+        """Комментарий, удаление поста и новая запись ленты меняют ETag"""
+        post = self.posts[0]
+        changes = [
+            (reverse('api:post', args=[post.id]),
+             lambda: Comment.objects.create(post=post, author=self.reader,
+                                            text='Ещё комментарий')),
+            (reverse('api:index'), lambda: self.posts[-1].delete()),
+            (reverse('api:follow_index'),
+             lambda: Post.objects.create(text='В ленту', author=self.author)),
+        ]
+        for url, change in changes:
+            with self.subTest(url=url):
+                etag = self.reader_client.get(url)['ETag']
+                change()
+                response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_read_only(self):
+        """API не принимает запросы на запись"""
+        response = self.reader_client.post(reverse('api:index'))
+        self.assertEqual(response.status_code, 405)
@@ -0,0 +1,130 @@
+"""Версионированный JSON API только для чтения.
+
+Ленты отдаются теми же querysets и курсорной пагинацией, что и HTML-страницы.
+Ответы несут ``ETag``, поэтому клиент, опрашивающий ленту с
+``If-None-Match``, получает 304 без тела, пока в ней ничего не изменилось.
+ETag считается, как у HTML-страниц (``posts.cache.etag``), из версий
+областей кэша и дешёвого агрегата — до выборки страницы и сериализации.
+"""
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import require_GET
+
+from posts import cache
+from posts.models import Group, Post, TimelineEntry
+from posts.paginator import CursorPaginator, POSTS_PER_PAGE
+from posts.views import comments_page, entries_to_posts
+
+User = get_user_model()
+
+
+def serialize_post(post):
+    return {
+        'id': post.id,
+        'author': post.author.username,
+        'group': post.group.slug if post.group_id else None,
+        'text': post.text,
+        'pub_date': post.pub_date,
+        'image': post.image.url if post.image else None,
+        'comments_count': post.comments_count,
+    }
+
+
+def serialize_comment(comment):
+    return {
+        'id': comment.id,
+        'author': comment.author.username,
+        'text': comment.text,
+        'created': comment.created,
+    }
+
+
+def latest(posts):
+    return posts.aggregate(modified=Max('updated'))['modified']
+
+
+def conditional_json(request, build, scopes, *aggregates):
+    """JSON-ответ с ``ETag`` или 304, если у клиента та же версия.
+
+    ``build`` собирает данные ответа и вызывается, только если версия
+    клиента устарела. ``Last-Modified`` не отдаём: после удаления самого
+    свежего поста дата ушла бы назад.
+    """
+    etag = cache.etag(request, scopes, *aggregates)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        content = json.dumps(build(), cls=DjangoJSONEncoder,
+                             ensure_ascii=False)
+        response = HttpResponse(content, content_type='application/json')
+    response['ETag'] = etag
+    response['Vary'] = 'Cookie'
+    return response
+
+
+def feed(request, object_list, scopes, *aggregates, **options):
+    def build():
+        paginator = CursorPaginator(object_list, POSTS_PER_PAGE, **options)
+        page = paginator.get_page(after=request.GET.get('after'),
+                                  before=request.GET.get('before'))
+        return {
+            'results': [serialize_post(post) for post in page],
+            'next': page.next_cursor(),
+            'previous': page.previous_cursor(),
+        }
+    return conditional_json(request, build, scopes, *aggregates)
+
+
+@require_GET
+def index(request):
+    return feed(request, Post.objects.feed(), [cache.index_scope()],
+                latest(Post.objects.all()))
+
+
+@require_GET
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return feed(request, group.groups.feed(), [cache.group_scope(slug)],
+                latest(group.groups.all()))
+
+
+@require_GET
+def profile(request, username):
+    author = get_object_or_404(User, username=username)
+    return feed(request, author.posts.feed(),
+                [cache.author_scope(username)], latest(author.posts.all()))
+
+
+@require_GET
+def follow_index(request):
+    if not request.user.is_authenticated:
+        return JsonResponse({'detail': 'Требуется авторизация'}, status=401)
+    entries = TimelineEntry.objects.filter(
+        user=request.user).select_related('post__author', 'post__group')
+    # Ленту подписок наполняет фоновая задача, областей кэша у неё нет:
+    # число и последняя запись меняются при каждой вставке и удалении.
+    state = TimelineEntry.objects.filter(user=request.user).aggregate(
+        count=Count('pk'), last=Max('pk'), modified=Max('post__updated'))
+    return feed(request, entries, [], *state.values(), tiebreak='post_id',
+                transform=entries_to_posts)
+
+
+@require_GET
+def post(request, post_id):
+    post = get_object_or_404(Post.objects.feed(), pk=post_id)
+
+    def build():
+        comments = comments_page(request, post)
+        data = serialize_post(post)
+        data['comments'] = [serialize_comment(comment)
+                            for comment in comments]
+        data['comments_next'] = comments.next_cursor()
+        return data
+    # Комментарии сдвигают версию области поста.
+    return conditional_json(request, build, [cache.post_scope(post.pk)],
+                            post.updated)
@@ -0,0 +1,96 @@
+"""Доля попаданий в кэш главной страницы при нескольких воркерах.
+
+Каждый воркер — отдельный процесс, как у gunicorn. Запросы к страницам
+ленты распределены по закону Ципфа: первые страницы читают чаще.
+
+    python -m benchmarks.cache_hit_rate --workers 4 --requests 300
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from benchmarks import utils
+
+# Кэш в памяти процесса (lru, locmem) для default больше не допускается.
+BACKENDS = ['sqlite', 'file']
+
+
+def worker(args):
+    backend, location, database, requests, pages, seed = args
+    utils.setup(database, YATUBE_CACHE=backend,
+                YATUBE_CACHE_LOCATION=location)
+    from django.test import Client
+
+    client = Client()
+    rng = random.Random(seed)
+    weights = [1 / page for page in range(1, pages + 1)]
+    hits = 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        page = rng.choices(range(1, pages + 1), weights)[0]
+        response = client.get('/', {'page': page})
+        # Из кэша страница отдаётся без рендеринга шаблона.
+        if response.context is None:
+            hits += 1
+    return hits, requests, time.perf_counter() - started
+
+
+def run(backend, directory, database, options):
+    location = os.path.join(directory, backend,
+                            'cache.sqlite3' if backend == 'sqlite' else '')
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(options.workers) as pool:
+        results = pool.map(worker, [
+            (backend, location, database, options.requests, options.pages,
+             seed) for seed in range(options.workers)
+        ])
+    hits = sum(result[0] for result in results)
+    total = sum(result[1] for result in results)
+    elapsed = max(result[2] for result in results)
+    return {
+        'backend': backend,
+        'workers': options.workers,
+        'requests': total,
+        'hits': hits,
+        'hit_rate': round(hits / total, 4),
+        'requests_per_second': round(total / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=300,
+                        help='запросов на воркер')
+    parser.add_argument('--pages', type=int, default=20)
+    parser.add_argument('--posts', type=int, default=500)
+    parser.add_argument('--backends', nargs='+', default=BACKENDS,
+                        choices=BACKENDS)
+    parser.add_argument('--json', action='store_true',
+                        help='вывести результаты в JSON')
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, 'bench.sqlite3')
+        utils.setup(database)
+        utils.migrate()
+        utils.seed(posts=options.posts)
+
+        results = [run(backend, directory, database, options)
+                   for backend in options.backends]
+
+    if options.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+    print(f'{"backend":<8} {"hit rate":>9} {"req/s":>9}')
+    for result in results:
+        print(f'{result["backend"]:<8} {result["hit_rate"]:>9.1%} '
+              f'{result["requests_per_second"]:>9}')
+
+
+if __name__ == '__main__':
+    main()
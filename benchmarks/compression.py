@@ -0,0 +1,102 @@
+"""Размер и стоимость сжатия главной страницы.
+
+Для тела главной страницы (десять карточек и пагинатор) печатает размер
+после gzip и brotli разных уровней и время сжатия, а затем время ответа
+через тестовый клиент: без сжатия, со сжатием на лету (авторизованный
+пользователь) и с готовой сжатой копией из кэша (анонимный посетитель).
+
+    python -m benchmarks.compression --posts 500 --repeat 50
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks import utils
+
+CODECS = [('gzip', 1), ('gzip', 6), ('gzip', 9),
+          ('br', 1), ('br', 4), ('br', 9), ('br', 11)]
+
+
+def best_time(function, repeat, rounds):
+    """Лучшее из ``rounds`` среднее время вызова в миллисекундах."""
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            function()
+        timings.append((time.perf_counter() - started) / repeat)
+    return min(timings) * 1000
+
+
+def codecs(content, repeat, rounds):
+    from yatube import compression
+
+    print(f'тело страницы: {len(content)} байт')
+    print(f'{"кодировка":<10} {"уровень":>7} {"байт":>8} {"доля":>6} '
+          f'{"сжатие, мс":>11}')
+    for encoding, level in CODECS:
+        if encoding not in compression.available_encodings():
+            continue
+        size = len(compression.compress(content, encoding, level))
+        elapsed = best_time(
+            lambda: compression.compress(content, encoding, level),
+            repeat, rounds)
+        print(f'{encoding:<10} {level:>7} {size:>8} '
+              f'{size / len(content):>6.1%} {elapsed:>11.2f}')
+
+
+def responses(user, repeat):
+    from django.core.cache import cache
+    from django.test import Client
+
+    anonymous, authenticated = Client(), Client()
+    authenticated.force_login(user)
+    variants = [
+        ('аноним, без сжатия', anonymous, {}),
+        ('аноним, br из кэша', anonymous, {'HTTP_ACCEPT_ENCODING': 'br'}),
+        ('аноним, gzip из кэша', anonymous,
+         {'HTTP_ACCEPT_ENCODING': 'gzip'}),
+        ('автор, без сжатия', authenticated, {}),
+        ('автор, br на лету', authenticated, {'HTTP_ACCEPT_ENCODING': 'br'}),
+        ('автор, gzip на лету', authenticated,
+         {'HTTP_ACCEPT_ENCODING': 'gzip'}),
+    ]
+    print(f'\n{"ответ /":<24} {"байт":>8} {"p50, мс":>8}')
+    for title, client, headers in variants:
+        cache.clear()
+        # Первый запрос заполняет кэш страниц и сжатых копий.
+        client.get('/', **headers)
+        latencies = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = client.get('/', **headers)
+            latencies.append((time.perf_counter() - started) * 1000)
+        print(f'{title:<24} {len(response.content):>8} '
+              f'{statistics.median(latencies):>8.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--rounds', type=int, default=5)
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        utils.setup(os.path.join(directory, 'bench.sqlite3'))
+        utils.migrate()
+        utils.seed(users=50, posts=options.posts,
+                   comments=options.posts * 2, follows=200)
+
+        from django.contrib.auth import get_user_model
+        from django.test import Client
+
+        content = Client().get('/').content
+        codecs(content, options.repeat, options.rounds)
+        responses(get_user_model().objects.first(), options.repeat)
+
+
+if __name__ == '__main__':
+    main()
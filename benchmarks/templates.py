@@ -0,0 +1,132 @@
+"""Микробенчмарк рендеринга карточек постов.
+
+Сравнивает стоимость одной карточки при прежней схеме — ``{% include %}``
+шаблона карточки на каждый пост — и при рендеринге всей ленты одним
+шаблоном ``includes/post_list.html``, с обычными и с кэширующими
+загрузчиками шаблонов. Базы данных не требуется: посты создаются в памяти.
+
+    python -m benchmarks.templates --cards 10 --repeat 200 --rounds 5
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks import utils
+
+LIST_TEMPLATE = 'includes/post_list.html'
+FOR_TAG = '{% for post in posts %}'
+END_TAG = '{% endfor %}'
+
+LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+def include_templates(source):
+    """Прежние шаблоны: цикл с include и отдельная карточка."""
+    head, rest = source.split(FOR_TAG, 1)
+    body = rest[:rest.rindex(END_TAG)]
+    load = next(line for line in head.splitlines()
+                if line.startswith('{% load'))
+    return {
+        'bench/feed.html': (FOR_TAG + '{% include "bench/item.html" '
+                            'with post=post %}' + END_TAG),
+        'bench/item.html': load + body,
+    }
+
+
+def make_engine(base, templates, cached):
+    from django.template import Engine
+
+    loaders = [('django.template.loaders.locmem.Loader', templates),
+               *LOADERS]
+    if cached:
+        loaders = [('django.template.loaders.cached.Loader', loaders)]
+    return Engine(dirs=base.dirs, loaders=loaders,
+                  libraries=base.libraries, builtins=base.builtins)
+
+
+def make_posts(count):
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+
+    from posts import rendering
+    from posts.models import Group, Post
+
+    User = get_user_model()
+    group = Group(title='Группа', slug='group')
+    posts = []
+    for i in range(count):
+        author = User(pk=i + 1, username=f'author{i}')
+        posts.append(Post(
+            pk=i + 1, author=author, group=group,
+            text='Текст поста\nс переносами строк ' * 20,
+            pub_date=timezone.now(), comments_count=i))
+        rendering.render_instance(posts[-1])
+    return posts
+
+
+def measure(engine, name, context, repeat, cards, rounds):
+    """Время первого рендера и лучшее из ``rounds`` время на карточку."""
+    from django.template import Context
+
+    started = time.perf_counter()
+    engine.get_template(name).render(Context(context))
+    first = (time.perf_counter() - started) * 1000
+
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            engine.get_template(name).render(Context(context))
+        timings.append(time.perf_counter() - started)
+    per_card = min(timings) / (repeat * cards) * 10 ** 6
+    return first, per_card
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cards', type=int, default=10,
+                        help='карточек на странице')
+    parser.add_argument('--repeat', type=int, default=200,
+                        help='рендерингов страницы за раунд')
+    parser.add_argument('--rounds', type=int, default=5)
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        utils.setup(os.path.join(directory, 'bench.sqlite3'))
+
+        from django.contrib.auth.models import AnonymousUser
+        from django.template import engines
+        from django.test.utils import teardown_test_environment
+
+        # Тестовое окружение шлёт сигнал на каждый рендер шаблона, что
+        # искажает сравнение с include.
+        teardown_test_environment()
+
+        base = engines['django'].engine
+        source = base.get_template(LIST_TEMPLATE).source
+        templates = include_templates(source)
+        context = {'posts': make_posts(options.cards),
+                   'user': AnonymousUser()}
+
+        variants = [
+            ('include на карточку', 'bench/feed.html', False),
+            ('include на карточку, кэш', 'bench/feed.html', True),
+            ('post_list.html', LIST_TEMPLATE, False),
+            ('post_list.html, кэш', LIST_TEMPLATE, True),
+        ]
+        print(f'{"вариант":<28} {"первый рендер, мс":>18} '
+              f'{"на карточку, мкс":>17}')
+        for title, name, cached in variants:
+            engine = make_engine(base, templates, cached)
+            first, per_card = measure(engine, name, context,
+                                      options.repeat, options.cards,
+                                      options.rounds)
+            print(f'{title:<28} {first:>18.2f} {per_card:>17.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Общая подготовка окружения для бенчмарков.
+
+Бенчмарки запускаются из корня проекта как ``python -m benchmarks.<имя>``
+и работают на отдельной временной базе SQLite, не трогая db.sqlite3.
+"""
+import os
+import random
+
+import django
+
+SETTINGS_MODULE = 'yatube.settings'
+
+
+def setup(database, **environ):
+    """Настраивает Django на базу ``database``.
+
+    ``environ`` позволяет переопределить переменные окружения, от которых
+    зависят настройки (например, ``YATUBE_CACHE``), до их чтения.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', SETTINGS_MODULE)
+    # Общий кэш — файл рядом с временной базой, а не кэш сайта.
+    directory = os.path.dirname(database)
+    environ.setdefault('YATUBE_CACHE_LOCATION',
+                       os.path.join(directory, 'cache.sqlite3'))
+    environ.setdefault('YATUBE_REQUEST_STATS_LOCATION',
+                       os.path.join(directory, 'request_stats.sqlite3'))
+    os.environ.update(environ)
+
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = database
+    django.setup()
+
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+
+
+def migrate():
+    from django.core.management import call_command
+
+    call_command('migrate', verbosity=0)
+
+
+def seed(users=50, groups=5, posts=1000, comments=2000, follows=500,
+         seed=0):
+    """Заполняет базу синтетическими данными заданного размера."""
+    from django.contrib.auth import get_user_model
+    from django.db import transaction
+
+    from posts import jobs
+    from posts.models import Comment, Follow, Group, Post, UserStats
+
+    User = get_user_model()
+    rng = random.Random(seed)
+
+    with transaction.atomic():
+        User.objects.bulk_create([
+            User(username=f'user_{i}') for i in range(users)
+        ])
+        user_ids = list(User.objects.values_list('pk', flat=True))
+        Group.objects.bulk_create([
+            Group(title=f'Группа {i}', slug=f'group-{i}', description='')
+            for i in range(groups)
+        ])
+        group_ids = list(Group.objects.values_list('pk', flat=True))
+
+        # Пишем через save(), чтобы сработали сигналы: счётчики и ленты
+        # подписок должны быть такими же, как на живом сайте.
+        pairs = set()
+        while len(pairs) < min(follows, users * (users - 1)):
+            user_id, author_id = rng.sample(user_ids, 2)
+            pairs.add((user_id, author_id))
+        for user_id, author_id in pairs:
+            Follow.objects.create(user_id=user_id, author_id=author_id)
+
+        for i in range(posts):
+            Post.objects.create(
+                text=f'Пост номер {i} ' + 'текст ' * rng.randint(5, 50),
+                author_id=rng.choice(user_ids),
+                group_id=rng.choice(group_ids + [None]),
+            )
+        post_ids = list(Post.objects.values_list('pk', flat=True))
+        for i in range(comments):
+            Comment.objects.create(
+                post_id=rng.choice(post_ids),
+                author_id=rng.choice(user_ids),
+                text=f'Комментарий {i}',
+            )
+        for user_id in user_ids:
+            UserStats.objects.rebuild(user_id)
+
+    # Ленты подписок и поисковый индекс заполняют фоновые задачи, которые
+    # сигналы поставили в очередь при коммите; выполняем их здесь же.
+    while jobs.work('seed', batch_size=1000):
+        pass
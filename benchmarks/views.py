@@ -0,0 +1,187 @@
+"""Нагрузочный бенчмарк представлений posts.
+
+Заполняет временную базу синтетическими данными и прогоняет через
+тестовый клиент ленты, страницу поста и формы записи. Для каждого
+представления считает перцентили времени ответа, число SQL-запросов и
+пик выделенной памяти на запрос. Результаты в JSON можно сравнить с
+прогоном на другом коммите через ``--compare``.
+
+    python -m benchmarks.views --posts 5000 --requests 50 -o bench.json
+    python -m benchmarks.views --compare bench.json
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks import utils
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def scenarios(rng):
+    """Имя представления -> функция, отдающая (метод, url, данные)."""
+    from django.contrib.auth import get_user_model
+    from django.urls import reverse
+
+    from posts.models import Follow, Group, Post
+
+    User = get_user_model()
+    follower_ids = list(
+        Follow.objects.values_list('user_id', flat=True).distinct())
+    users = list(User.objects.filter(pk__in=follower_ids))
+    groups = list(Group.objects.values_list('slug', flat=True))
+    posts = list(Post.objects.values_list('pk', 'author__username'))
+
+    def post():
+        post_id, username = rng.choice(posts)
+        return post_id, username
+
+    return users, {
+        'index': lambda: ('get', reverse('index'), None),
+        'group_posts': lambda: (
+            'get', reverse('group', args=[rng.choice(groups)]), None),
+        'profile': lambda: (
+            'get', reverse('profile', args=[post()[1]]), None),
+        'post_view': lambda: (
+            'get', reverse('post', args=post()[::-1]), None),
+        'follow_index': lambda: ('get', reverse('follow_index'), None),
+        'new_post': lambda: (
+            'post', reverse('new_post'), {'text': 'Бенчмарк'}),
+        'add_comment': lambda: (
+            'post', reverse('add_comment', args=post()[::-1]),
+            {'text': 'Бенчмарк'}),
+    }
+
+
+def measure(client, request, requests):
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    def call():
+        method, url, data = request()
+        cache.clear()
+        response = getattr(client, method)(url, data)
+        if response.status_code >= 400:
+            raise RuntimeError(f'{url}: HTTP {response.status_code}')
+
+    latencies, queries, memory = [], [], []
+    for _ in range(requests):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            call()
+            latencies.append((time.perf_counter() - started) * 1000)
+        queries.append(len(captured))
+
+    # tracemalloc заметно замедляет код, поэтому память меряем отдельно.
+    for _ in range(max(1, requests // 5)):
+        tracemalloc.start()
+        call()
+        memory.append(tracemalloc.get_traced_memory()[1] / 1024)
+        tracemalloc.stop()
+    return {
+        'requests': requests,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 0.5), 2),
+            'p90': round(percentile(latencies, 0.9), 2),
+            'p99': round(percentile(latencies, 0.99), 2),
+            'mean': round(statistics.mean(latencies), 2),
+        },
+        'queries': {'mean': round(statistics.mean(queries), 1),
+                    'max': max(queries)},
+        'peak_memory_kb': {'mean': round(statistics.mean(memory), 1),
+                           'max': round(max(memory), 1)},
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous, current):
+    print(f'{"view":<14} {"p50, мс":>16} {"запросы":>14} {"память, КБ":>18}')
+    for name, result in current['views'].items():
+        before = previous['views'].get(name)
+        if before is None:
+            continue
+        print(f'{name:<14} '
+              f'{before["latency_ms"]["p50"]:>7} → '
+              f'{result["latency_ms"]["p50"]:<7}'
+              f'{before["queries"]["mean"]:>6} → '
+              f'{result["queries"]["mean"]:<6}'
+              f'{before["peak_memory_kb"]["mean"]:>8} → '
+              f'{result["peak_memory_kb"]["mean"]:<8}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--groups', type=int, default=10)
+    parser.add_argument('--posts', type=int, default=2000)
+    parser.add_argument('--comments', type=int, default=5000)
+    parser.add_argument('--follows', type=int, default=2000)
+    parser.add_argument('--requests', type=int, default=30,
+                        help='запросов на каждое представление')
+    parser.add_argument('--views', nargs='+',
+                        help='прогнать только эти представления')
+    parser.add_argument('-o', '--output', help='записать результаты в JSON')
+    parser.add_argument('--compare', help='JSON предыдущего прогона')
+    parser.add_argument('--seed', type=int, default=0)
+    options = parser.parse_args()
+
+    rng = random.Random(options.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        utils.setup(os.path.join(directory, 'bench.sqlite3'))
+        utils.migrate()
+        started = time.perf_counter()
+        utils.seed(users=options.users, groups=options.groups,
+                   posts=options.posts, comments=options.comments,
+                   follows=options.follows, seed=options.seed)
+        print(f'Данные созданы за {time.perf_counter() - started:.1f} с')
+
+        from django.test import Client
+
+        users, views = scenarios(rng)
+        client = Client()
+        client.force_login(rng.choice(users))
+        results = {}
+        for name, request in views.items():
+            if options.views and name not in options.views:
+                continue
+            results[name] = measure(client, request, options.requests)
+            latency = results[name]['latency_ms']
+            print(f'{name:<14} p50 {latency["p50"]:>8} мс  '
+                  f'p99 {latency["p99"]:>8} мс  '
+                  f'запросов {results[name]["queries"]["mean"]:>5}')
+
+    report = {
+        'revision': git_revision(),
+        'dataset': {key: getattr(options, key) for key in
+                    ('users', 'groups', 'posts', 'comments', 'follows')},
+        'views': results,
+    }
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+    if options.compare:
+        with open(options.compare) as previous:
+            compare(json.load(previous), report)
+
+
+if __name__ == '__main__':
+    main()
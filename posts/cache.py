@@ -0,0 +1,153 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import Max
+from django.http import HttpResponse
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_cookie
+
+from yatube import cache_backends
+
+from . import instrumentation
+
+VERSION_KEY = 'version:{}'
+
+
+def shared_cache():
+    """Кэш версий и страниц: сдвиг версии должен увидеть каждый воркер."""
+    return cache_backends.shared('default', 'версии страниц')
+
+
+def index_scope():
+    return 'index'
+
+
+def group_scope(slug):
+    return f'group:{slug}'
+
+
+def author_scope(username):
+    return f'author:{username}'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def get_versions(scopes):
+    """Текущие версии областей кэша одним обращением к кэшу."""
+    cache = shared_cache()
+    keys = [VERSION_KEY.format(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Версия может быть вытеснена из кэша раньше страниц, поэтому
+            # новая версия не должна совпасть ни с одной из прежних.
+            cache.add(key, int(time.time() * 1000), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump(*scopes):
+    """Инвалидирует все страницы, зависящие от перечисленных областей."""
+    cache = shared_cache()
+    for scope in scopes:
+        key = VERSION_KEY.format(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, int(time.time() * 1000), None)
+
+
+def bump_post(post, *extra_scopes):
+    """Инвалидирует ленты и страницы, на которых показан пост."""
+    scopes = [index_scope(), author_scope(post.author.username),
+              post_scope(post.pk), *extra_scopes]
+    if post.group_id is not None:
+        scopes.append(group_scope(post.group.slug))
+    bump(*scopes)
+
+
+def page_key(request, name, scopes):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    versions = '.'.join(str(version) for version in get_versions(scopes))
+    return f'view:{name}:{path}:{versions}'
+
+
+def cached_view(scopes):
+    """Кэширует страницу для анонимных посетителей.
+
+    ``scopes`` получает аргументы view и возвращает области, от которых
+    зависит страница; ключ включает путь с номером страницы и версии
+    областей, поэтому после ``bump`` старая копия просто перестаёт
+    использоваться. Страницы авторизованных пользователей содержат CSRF-токен
+    и кнопки подписки, их не кэшируем. Ключ страницы сохраняется в
+    ``response.compression_key``: по нему ``yatube.compression`` кэширует
+    сжатую копию.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+
+            key = page_key(request, view.__name__, scopes(*args, **kwargs))
+            cache = shared_cache()
+            cached = cache.get(key)
+            instrumentation.count_cache(cached is not None)
+            if cached is not None:
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+                response.compression_key = key
+                return response
+
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                cache.set(key, (response.content, response['Content-Type']),
+                          settings.VIEW_CACHE_TIMEOUT)
+                response.compression_key = key
+            return response
+        return wrapper
+    return decorator
+
+
+def etag(request, scopes, *extra):
+    """ETag страницы без её рендеринга.
+
+    Учитывает версии областей ``scopes``, пользователя, ключ сессии и
+    CSRF-cookie: страница авторизованного пользователя содержит CSRF-токен,
+    и после входа или смены токена браузер не должен получить 304 со старой
+    формой. ``extra`` — дешёвые агрегаты, которые версии не покрывают.
+    """
+    raw = '|'.join(str(part) for part in (
+        request.user.pk,
+        request.session.session_key,
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME),
+        get_versions(scopes),
+        *extra,
+    ))
+    return '"{}"'.format(hashlib.md5(raw.encode()).hexdigest())
+
+
+def conditional_view(posts, scopes):
+    """Отвечает 304, если страница не менялась с прошлого запроса клиента.
+
+    ``posts`` получает аргументы view и возвращает queryset постов страницы,
+    ``scopes`` — области кэша, от которых зависит страница. ``ETag`` (см.
+    ``etag``) учитывает самое свежее ``updated`` среди постов и версии
+    областей, поэтому меняется и при правке поста, и после удаления,
+    комментария или подписки. ``Last-Modified`` не отдаём: после удаления
+    самого свежего поста ``Max('updated')`` уходит назад, и клиент с более
+    новой датой получил бы 304 на изменившуюся страницу.
+    """
+    def decorator(view):
+        def etag_func(request, *args, **kwargs):
+            modified = posts(*args, **kwargs).aggregate(
+                modified=Max('updated'))['modified']
+            return etag(request, scopes(*args, **kwargs), modified)
+
+        return vary_on_cookie(wraps(view)(
+            condition(etag_func=etag_func)(view)))
+    return decorator
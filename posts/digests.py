@@ -0,0 +1,98 @@
+"""Письма-дайджесты с новыми постами для подписчиков.
+
+Новые посты берутся из готовых лент ``TimelineEntry``: всё, что появилось
+в ленте после записи ``DigestWatermark.last_entry``, уходит одним письмом,
+а отметка сдвигается на последнюю запись лент на момент запуска. Посты
+старше ``DIGEST_MAX_AGE`` в письмо не попадают: это и первая рассылка
+новичку, и старые посты автора, добавленные в ленту при подписке.
+Пользователи обрабатываются пачками: на пачку открывается одно
+SMTP-подключение, а в памяти держится не больше ``batch_size`` писем по
+``max_posts`` постов в каждом.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Max
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import DigestWatermark, TimelineEntry
+
+User = get_user_model()
+
+SUBJECT = 'Новые посты в вашей ленте Yatube'
+
+
+def build_digest(user, after, until, since, max_posts):
+    """Письмо с записями ленты ``user`` из (after, until] или None.
+
+    ``after`` и ``until`` — ``pk`` записей ленты, посты не старше ``since``.
+    """
+    entries = (TimelineEntry.objects
+               .filter(user=user, pk__gt=after, pk__lte=until,
+                       pub_date__gt=since)
+               .select_related('post__author'))
+    posts = [entry.post for entry in entries[:max_posts]]
+    if not posts:
+        return None
+    more = 0
+    if len(posts) == max_posts:
+        more = entries.count() - max_posts
+    body = render_to_string('posts/email/digest.txt', {
+        'user': user,
+        'posts': posts,
+        'more': more,
+        'site_url': settings.SITE_URL,
+    })
+    return EmailMessage(SUBJECT, body, to=[user.email])
+
+
+def send_digests(batch_size=None, max_posts=None, now=None):
+    """Рассылает дайджесты всем, у кого в ленте есть новые посты.
+
+    Возвращает число отправленных писем.
+    """
+    batch_size = batch_size or settings.DIGEST_BATCH_SIZE
+    max_posts = max_posts or settings.DIGEST_MAX_POSTS
+    now = now or timezone.now()
+    since = now - timedelta(seconds=settings.DIGEST_MAX_AGE)
+    # Записи, вставленные во время рассылки, уйдут в следующий раз.
+    until = TimelineEntry.objects.aggregate(last=Max('pk'))['last'] or 0
+
+    users = (User.objects.filter(is_active=True).exclude(email='')
+             .select_related('digest_watermark').order_by('pk'))
+    sent = 0
+    last_pk = 0
+    while True:
+        batch = list(users.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return sent
+        last_pk = batch[-1].pk
+
+        messages = []
+        for user in batch:
+            watermark = getattr(user, 'digest_watermark', None)
+            after = watermark.last_entry if watermark else 0
+            message = build_digest(user, after, until, since, max_posts)
+            if message is not None:
+                messages.append(message)
+
+        if messages:
+            connection = get_connection()
+            connection.open()
+            try:
+                sent += connection.send_messages(messages) or 0
+            finally:
+                connection.close()
+
+        with transaction.atomic():
+            DigestWatermark.objects.filter(
+                user__in=batch).update(last_entry=until)
+            DigestWatermark.objects.bulk_create(
+                [DigestWatermark(user=user, last_entry=until)
+                 for user in batch
+                 if not hasattr(user, 'digest_watermark')],
+                ignore_conflicts=True)
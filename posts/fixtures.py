@@ -0,0 +1,139 @@
+"""Потоковое чтение и запись фикстур в формате ``dumpdata``.
+
+В отличие от ``dumpdata``/``loaddata`` файл никогда не читается и не
+собирается в памяти целиком: объекты пишутся и разбираются по одному.
+"""
+import codecs
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Model
+
+EXPORTED_MODELS = [
+    'auth.user',
+    'posts.group',
+    'posts.post',
+    'posts.comment',
+    'posts.follow',
+]
+
+# Поля, которых нет в старых выгрузках: модель -> {поле: откуда взять}.
+# Например, Post.updated появился позже pub_date.
+MISSING_FIELDS = {
+    'posts.post': {'updated': 'pub_date'},
+}
+
+READ_SIZE = 64 * 1024
+
+
+def serialize(obj):
+    """Словарь объекта в том же виде, что у сериализатора ``python``.
+
+    Значения many-to-many берутся из prefetch_related, поэтому выгрузка
+    пачки объектов не делает запросов на каждый объект.
+    """
+    opts = obj._meta
+    fields = {}
+    for field in opts.local_fields:
+        if not field.serialize or field.primary_key:
+            continue
+        if field.remote_field is not None:
+            fields[field.name] = getattr(obj, field.attname)
+        else:
+            value = field.value_from_object(obj)
+            if isinstance(value, (str, int, float, bool, type(None))):
+                fields[field.name] = value
+            else:
+                fields[field.name] = field.value_to_string(obj)
+    for field in opts.local_many_to_many:
+        if field.serialize:
+            fields[field.name] = [
+                related.pk for related in getattr(obj, field.name).all()]
+    return {'model': opts.label_lower, 'pk': obj.pk, 'fields': fields}
+
+
+class ArrayWriter:
+    """Пишет JSON-массив объектов по одному объекту на строку."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.count = 0
+
+    def __enter__(self):
+        self.stream.write('[')
+        return self
+
+    def write(self, data):
+        if isinstance(data, Model):
+            data = serialize(data)
+        self.stream.write(',\n' if self.count else '\n')
+        self.stream.write(json.dumps(data, cls=DjangoJSONEncoder,
+                                     ensure_ascii=False))
+        self.count += 1
+
+    def __exit__(self, *exc_info):
+        self.stream.write('\n]\n')
+
+
+def fill_missing_fields(item):
+    """Дополняет объект старой выгрузки полями, появившимися позже."""
+    fields = item['fields']
+    for field, source in MISSING_FIELDS.get(item['model'], {}).items():
+        if fields.get(field) is None:
+            fields[field] = fields.get(source)
+    return item
+
+
+def iter_array(stream, offset=0):
+    """Разбирает JSON-массив из бинарного потока по одному элементу.
+
+    Отдаёт пары ``(элемент, смещение)``, где смещение — позиция в байтах
+    сразу после элемента. С этого смещения чтение можно продолжить,
+    передав его в ``offset``.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    stream.seek(offset)
+    buffer = ''
+    position = offset
+    expect = 'value' if offset else 'open'
+    eof = False
+
+    while True:
+        stripped = buffer.lstrip()
+        position += len(buffer[:len(buffer) - len(stripped)].encode())
+        buffer = stripped
+        if not buffer:
+            if eof:
+                raise ValueError('Файл фикстуры оборвался')
+            chunk = stream.read(READ_SIZE)
+            eof = not chunk
+            buffer += utf8.decode(chunk, final=eof)
+            continue
+
+        if expect == 'open':
+            if buffer[0] != '[':
+                raise ValueError('Фикстура должна быть JSON-массивом')
+            buffer, position, expect = buffer[1:], position + 1, 'first'
+            continue
+        if buffer[0] == ']':
+            return
+        if expect == 'value':
+            if buffer[0] != ',':
+                raise ValueError(f'Ожидалась запятая на байте {position}')
+            buffer, position, expect = buffer[1:], position + 1, 'first'
+            continue
+
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = stream.read(READ_SIZE)
+            eof = not chunk
+            buffer += utf8.decode(chunk, final=eof)
+            continue
+        position += len(buffer[:end].encode())
+        buffer = buffer[end:]
+        expect = 'value'
+        yield item, position
@@ -0,0 +1,72 @@
+"""Кэш подписок пользователя.
+
+ID авторов, на которых подписан пользователь, хранятся в кэше одним
+отсортированным массивом ``array('l')``: проверка подписки — двоичный поиск
+без обращения к базе. Внутри запроса массив запоминается на объекте
+пользователя, поэтому кэш читается не больше одного раза.
+"""
+from array import array
+from bisect import bisect_left
+
+from yatube import cache_backends
+
+from .models import Follow
+
+FOLLOWS_KEY = 'follows:{}'
+# Сброс из сигналов доходит до всех воркеров через общий кэш; срок жизни —
+# страховка на случай записей в обход ORM.
+FOLLOWS_TIMEOUT = 60 * 60
+
+
+def shared_cache():
+    return cache_backends.shared('default', 'подписки пользователей')
+
+
+class FollowSet:
+    def __init__(self, ids):
+        self.ids = ids
+
+    def __contains__(self, author_id):
+        index = bisect_left(self.ids, author_id)
+        return index < len(self.ids) and self.ids[index] == author_id
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return iter(self.ids)
+
+
+def _load(user_id):
+    ids = array('l', Follow.objects.filter(user_id=user_id)
+                .order_by('author_id').values_list('author_id', flat=True))
+    shared_cache().set(FOLLOWS_KEY.format(user_id), ids.tobytes(),
+                       FOLLOWS_TIMEOUT)
+    return ids
+
+
+def followed_ids(user):
+    """Множество ID авторов, на которых подписан ``user``."""
+    if not user.is_authenticated:
+        return FollowSet(array('l'))
+    follows = getattr(user, '_follow_set', None)
+    if follows is None:
+        data = shared_cache().get(FOLLOWS_KEY.format(user.pk))
+        if data is None:
+            ids = _load(user.pk)
+        else:
+            ids = array('l')
+            ids.frombytes(data)
+        follows = user._follow_set = FollowSet(ids)
+    return follows
+
+
+def is_following(user, author):
+    return author.pk in followed_ids(user)
+
+
+def invalidate(user):
+    """Сбрасывает кэш подписок; ``user`` — пользователь или его ID."""
+    shared_cache().delete(FOLLOWS_KEY.format(getattr(user, 'pk', user)))
+    if hasattr(user, '_follow_set'):
+        del user._follow_set
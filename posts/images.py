@@ -0,0 +1,71 @@
+"""Обработка загружаемых картинок постов.
+
+Оригинал не сохраняется: картинка поворачивается по EXIF, уменьшается до
+``settings.IMAGE_MAX_SIZE`` и перекодируется в ``settings.IMAGE_FORMAT``
+без метаданных (в том числе геолокации из EXIF). Имя файла — хэш
+содержимого загрузки, поэтому повторная загрузка того же файла не
+создаёт копию, а ссылается на уже обработанный.
+"""
+import hashlib
+import io
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from .models import Post
+
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp'}
+
+
+def content_hash(upload):
+    digest = hashlib.sha256()
+    for chunk in upload.chunks():
+        digest.update(chunk)
+    upload.seek(0)
+    return digest.hexdigest()[:32]
+
+
+def process(upload):
+    """Уменьшенная и перекодированная картинка в виде байтов."""
+    max_size = settings.IMAGE_MAX_SIZE
+    with Image.open(upload) as image:
+        width, height = image.size
+        if width * height > settings.IMAGE_MAX_PIXELS:
+            raise ValidationError(
+                'Картинка слишком большая: не больше %(limit)s Мпикс.',
+                code='too_many_pixels',
+                params={'limit': settings.IMAGE_MAX_PIXELS // 10 ** 6})
+        # JPEG умеет декодироваться сразу в уменьшенном масштабе.
+        image.draft('RGB', max_size)
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(max_size, Image.LANCZOS)
+
+        image_format = settings.IMAGE_FORMAT
+        has_alpha = image.mode in ('RGBA', 'LA') or (
+            image.mode == 'P' and 'transparency' in image.info)
+        if image_format == 'JPEG' or not has_alpha:
+            image = image.convert('RGB')
+        else:
+            image = image.convert('RGBA')
+
+        output = io.BytesIO()
+        image.save(output, image_format, quality=settings.IMAGE_QUALITY,
+                   optimize=image_format != 'WEBP')
+    return output.getvalue()
+
+
+def ingest(upload):
+    """Обрабатывает загрузку и возвращает файл для ``Post.image``.
+
+    Если такой же файл уже загружали, возвращает имя готового файла
+    в хранилище — поле модели просто сошлётся на него.
+    """
+    field = Post._meta.get_field('image')
+    name = '{}.{}'.format(content_hash(upload),
+                          EXTENSIONS[settings.IMAGE_FORMAT])
+    stored_name = field.generate_filename(None, name)
+    if field.storage.exists(stored_name):
+        return stored_name
+    return ContentFile(process(upload), name=name)
@@ -0,0 +1,190 @@
+"""Замеры стоимости запросов по именам URL.
+
+``RequestStatsMiddleware`` считает для каждого запроса число и время
+SQL-запросов, время рендеринга шаблонов, попадания в кэш страниц и размер
+ответа. Замеры копятся в процессе и пачками сбрасываются в кэш
+``settings.REQUEST_STATS_CACHE``, общий для всех процессов: каждая пачка
+ложится под собственный ключ с номером из атомарного ``incr``, поэтому
+воркеры не затирают замеры друг друга. Отчёт собирает последние пачки и
+оставляет скользящее окно из ``WINDOW`` замеров на каждое имя URL.
+"""
+import contextvars
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends import django as django_backend
+
+from yatube import cache_backends
+
+WINDOW = 1000
+FLUSH_EVERY = 50
+FLUSH_INTERVAL = 10
+# Сколько последних пачек читает отчёт и сколько секунд они хранятся.
+HISTORY = 200
+BATCH_TIMEOUT = 60 * 60 * 24
+SEQUENCE_KEY = 'reqstats:sequence'
+BATCH_KEY = 'reqstats:batch:{}'
+
+FIELDS = ('duration_ms', 'queries', 'sql_ms', 'template_ms',
+          'cache_hits', 'cache_misses', 'response_bytes')
+
+_current = contextvars.ContextVar('request_stats', default=None)
+_pending = {}
+_pending_lock = threading.Lock()
+_last_flush = [time.monotonic()]
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.template_ms = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_ms += (time.perf_counter() - started) * 1000
+
+
+def count_cache(hit):
+    """Отмечает попадание или промах кэша в текущем запросе."""
+    stats = _current.get()
+    if stats is None:
+        return
+    if hit:
+        stats.cache_hits += 1
+    else:
+        stats.cache_misses += 1
+
+
+def _timed_render(render):
+    def wrapper(self, *args, **kwargs):
+        stats = _current.get()
+        if stats is None:
+            return render(self, *args, **kwargs)
+        stats.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            stats.template_depth -= 1
+            if not stats.template_depth:
+                stats.template_ms += (time.perf_counter() - started) * 1000
+    wrapper.timed = True
+    return wrapper
+
+
+def _install_template_timer():
+    template = django_backend.Template
+    if not getattr(template.render, 'timed', False):
+        template.render = _timed_render(template.render)
+
+
+def _record(name, sample):
+    with _pending_lock:
+        _pending.setdefault(name, []).append(sample)
+        due = (sum(len(samples) for samples in _pending.values())
+               >= FLUSH_EVERY
+               or time.monotonic() - _last_flush[0] >= FLUSH_INTERVAL)
+    if due:
+        flush()
+
+
+def store():
+    """Кэш для замеров; в кэше одного процесса отчёт бы ничего не видел."""
+    return cache_backends.shared(settings.REQUEST_STATS_CACHE,
+                                 'замеры запросов')
+
+
+def flush():
+    """Переносит накопленные в процессе замеры в общий кэш."""
+    with _pending_lock:
+        pending = dict(_pending)
+        _pending.clear()
+        _last_flush[0] = time.monotonic()
+    if not pending:
+        return
+    backend = store()
+    backend.add(SEQUENCE_KEY, 0, None)
+    number = backend.incr(SEQUENCE_KEY)
+    backend.set(BATCH_KEY.format(number), pending, BATCH_TIMEOUT)
+
+
+def _windows():
+    """Последние ``WINDOW`` замеров по каждому имени URL."""
+    backend = store()
+    last = backend.get(SEQUENCE_KEY) or 0
+    keys = [BATCH_KEY.format(number)
+            for number in range(max(1, last - HISTORY + 1), last + 1)]
+    batches = backend.get_many(keys)
+    windows = {}
+    for key in keys:
+        for name, samples in batches.get(key, {}).items():
+            windows.setdefault(name, []).extend(samples)
+    return {name: samples[-WINDOW:] for name, samples in windows.items()}
+
+
+def _percentiles(values):
+    ordered = sorted(values)
+
+    def at(fraction):
+        return round(ordered[min(len(ordered) - 1,
+                                 int(fraction * len(ordered)))], 2)
+    return {'p50': at(0.5), 'p90': at(0.9), 'p99': at(0.99),
+            'max': round(ordered[-1], 2)}
+
+
+def report():
+    """Перцентили по каждому имени URL за последнее окно замеров."""
+    flush()
+    result = {}
+    for name, samples in sorted(_windows().items()):
+        columns = dict(zip(('timestamp',) + FIELDS, zip(*samples)))
+        hits, misses = sum(columns['cache_hits']), sum(columns['cache_misses'])
+        result[name] = {
+            'requests': len(samples),
+            'since': min(columns['timestamp']),
+            'cache_hit_rate': (round(hits / (hits + misses), 4)
+                               if hits + misses else None),
+        }
+        for field in FIELDS:
+            if not field.startswith('cache_'):
+                result[name][field] = _percentiles(columns[field])
+    return result
+
+
+class RequestStatsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        store()
+        _install_template_timer()
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        duration_ms = (time.perf_counter() - started) * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        name = match.view_name if match and match.url_name else 'unresolved'
+        size = 0 if response.streaming else len(response.content)
+        _record(name, (time.time(), duration_ms, stats.queries,
+                       stats.sql_ms, stats.template_ms, stats.cache_hits,
+                       stats.cache_misses, size))
+        return response
@@ -0,0 +1,80 @@
+"""Очередь фоновых задач в базе данных.
+
+Задача — импортируемая функция с JSON-аргументами. ``enqueue`` записывает
+её в таблицу ``Job`` после коммита текущей транзакции, воркер
+``manage.py run_jobs`` забирает задачи пачками и выполняет. Упавшая задача
+перезапускается с экспоненциальной задержкой, после ``max_attempts``
+попыток остаётся в статусе ``failed`` вместе с трейсбеком.
+
+С ``settings.JOBS_EAGER`` задачи выполняются сразу при постановке —
+так удобно в тестах и при локальной разработке без воркера.
+"""
+import json
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+
+def task_name(task):
+    if isinstance(task, str):
+        return task
+    return f'{task.__module__}.{task.__qualname__}'
+
+
+def enqueue(task, unique=False, **kwargs):
+    """Ставит ``task(**kwargs)`` в очередь после коммита транзакции.
+
+    С ``unique`` задача не добавляется, если такая же ещё ждёт
+    или выполняется.
+    """
+    name = task_name(task)
+    if settings.JOBS_EAGER:
+        import_string(name)(**kwargs)
+        return
+
+    payload = json.dumps(kwargs, sort_keys=True)
+
+    def create():
+        if unique and Job.objects.filter(
+                task=name, kwargs=payload,
+                status__in=[Job.QUEUED, Job.RUNNING]).exists():
+            return
+        Job.objects.create(task=name, kwargs=payload,
+                           max_attempts=settings.JOB_MAX_ATTEMPTS)
+    transaction.on_commit(create)
+
+
+def run(job):
+    """Выполняет задачу; возвращает True, если она завершилась успешно."""
+    try:
+        import_string(job.task)(**json.loads(job.kwargs))
+    except Exception:
+        logger.exception('Задача %s #%s упала', job.task, job.pk)
+        job.last_error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            job.status = Job.FAILED
+        else:
+            job.status = Job.QUEUED
+            delay = settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+            job.run_at = timezone.now() + timedelta(seconds=delay)
+        job.save(update_fields=['status', 'run_at', 'last_error'])
+        return False
+    job.delete()
+    return True
+
+
+def work(worker, batch_size=10):
+    """Забирает и выполняет одну пачку задач, возвращает их число."""
+    jobs = Job.objects.claim(worker, batch_size, settings.JOB_TIMEOUT)
+    for job in jobs:
+        run(job)
+    return len(jobs)
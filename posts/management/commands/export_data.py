@@ -0,0 +1,40 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from posts.fixtures import EXPORTED_MODELS, ArrayWriter
+
+
+class Command(BaseCommand):
+    help = ('Потоково выгружает пользователей, группы, посты, комментарии '
+            'и подписки в фикстуру формата dumpdata')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, path, batch_size, **options):
+        with open(path, 'w', encoding='utf-8') as stream:
+            with ArrayWriter(stream) as writer:
+                for label in EXPORTED_MODELS:
+                    model = apps.get_model(label)
+                    exported = self.export_model(model, writer, batch_size)
+                    self.stdout.write(f'{label}: {exported}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Выгружено объектов: {writer.count}'))
+
+    def export_model(self, model, writer, batch_size):
+        queryset = model._default_manager.order_by('pk').prefetch_related(
+            *[field.name for field in model._meta.local_many_to_many])
+        count = 0
+        last_pk = None
+        while True:
+            batch = queryset
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+            batch = list(batch[:batch_size])
+            if not batch:
+                return count
+            for obj in batch:
+                writer.write(obj)
+            count += len(batch)
+            last_pk = batch[-1].pk
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Ставит в очередь создание недостающих миниатюр для уже '
+            'загруженных картинок постов')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--now', action='store_true',
+                            help='создать миниатюры сразу, без очереди')
+
+    def handle(self, *args, batch_size, now, **options):
+        posts = Post.objects.exclude(image='').order_by('pk')
+        total = 0
+        last_pk = 0
+        while True:
+            batch = list(posts.filter(pk__gt=last_pk)
+                         .only('pk', 'image')[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            for post in batch:
+                if thumbnails.is_complete(post.image):
+                    continue
+                if now:
+                    thumbnails.generate_for_post(post.image.name, post.pk)
+                else:
+                    thumbnails.schedule(post.image)
+                total += 1
+        action = 'создано' if now else 'поставлено в очередь'
+        self.stdout.write(self.style.SUCCESS(
+            f'Картинок без миниатюр: {action} {total}'))
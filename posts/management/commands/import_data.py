@@ -0,0 +1,132 @@
+import json
+import os
+from collections import defaultdict
+
+from django.apps import apps
+from django.core import serializers
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from posts.fixtures import EXPORTED_MODELS, fill_missing_fields, iter_array
+
+
+class Command(BaseCommand):
+    help = ('Потоково загружает фикстуру формата dumpdata пачками '
+            'bulk insert в отдельных транзакциях')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='продолжить с места, где прервалась прошлая загрузка')
+        parser.add_argument(
+            '--skip-rebuild', action='store_true',
+            help='не пересчитывать счётчики, ленты и поисковый индекс')
+
+    def handle(self, *args, path, batch_size, resume, skip_rebuild,
+               **options):
+        self.progress_path = f'{path}.progress'
+        self.total_size = os.path.getsize(path)
+        state = {'offset': 0, 'count': 0, 'skipped': 0}
+        if resume and os.path.exists(self.progress_path):
+            with open(self.progress_path) as progress:
+                state = json.load(progress)
+            self.stdout.write(
+                f'Продолжаем с объекта {state["count"]}')
+        elif resume:
+            raise CommandError(f'Нет файла {self.progress_path}')
+
+        self.tables = set()
+        with open(path, 'rb') as stream, \
+                connection.constraint_checks_disabled():
+            batch = []
+            for item, offset in iter_array(stream, state['offset']):
+                if item.get('model') not in EXPORTED_MODELS:
+                    state['skipped'] += 1
+                    continue
+                batch.append(fill_missing_fields(item))
+                if len(batch) >= batch_size:
+                    self.load(batch, state, offset)
+                    batch = []
+            if batch:
+                self.load(batch, state, offset)
+        connection.check_constraints(table_names=sorted(self.tables))
+        self.reset_sequences()
+        if os.path.exists(self.progress_path):
+            os.remove(self.progress_path)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено объектов: {state["count"]}, '
+            f'пропущено: {state["skipped"]}'))
+        if not skip_rebuild:
+            for command in ('rebuild_counters', 'rebuild_timelines',
+                            'rebuild_search_index', 'rerender_text'):
+                call_command(command, stdout=self.stdout)
+
+    def load(self, items, state, offset):
+        by_model = defaultdict(list)
+        for deserialized in serializers.deserialize('python', items):
+            by_model[type(deserialized.object)].append(deserialized)
+
+        with transaction.atomic():
+            for model, objects in by_model.items():
+                inserted = self.insert(
+                    model, [item.object for item in objects])
+                objects = [item for item in objects
+                           if item.object.pk in inserted]
+                for field in model._meta.local_many_to_many:
+                    self.insert_m2m(field, objects)
+
+        state['count'] += len(items)
+        state['offset'] = offset
+        with open(self.progress_path, 'w') as progress:
+            json.dump(state, progress)
+        self.stdout.write(
+            f'{state["count"]} объектов, '
+            f'{offset / self.total_size:.0%} файла')
+
+    def insert(self, model, objects):
+        """Вставляет объекты как loaddata (raw=True): без auto_now_add
+        и сигналов, а уже загруженные строки пропускает.
+
+        Возвращает pk вставленных объектов. Уже загруженные строки
+        отсеиваются запросом, а не INSERT OR IGNORE: тот молча пропускал бы
+        и строки, нарушающие NOT NULL или CHECK.
+        """
+        self.tables.add(model._meta.db_table)
+        fields = model._meta.local_concrete_fields
+        size = connection.ops.bulk_batch_size(fields, objects) or len(objects)
+        inserted = set()
+        for start in range(0, len(objects), size):
+            chunk = objects[start:start + size]
+            existing = set(model._base_manager.filter(
+                pk__in=[obj.pk for obj in chunk]).values_list(
+                    'pk', flat=True))
+            chunk = [obj for obj in chunk if obj.pk not in existing]
+            if chunk:
+                model._base_manager._insert(chunk, fields=fields, raw=True)
+                inserted.update(obj.pk for obj in chunk)
+        return inserted
+
+    def insert_m2m(self, field, objects):
+        through = field.remote_field.through
+        source = field.m2m_field_name()
+        target = field.m2m_reverse_field_name()
+        rows = [
+            through(**{f'{source}_id': item.object.pk,
+                       f'{target}_id': related_pk})
+            for item in objects
+            for related_pk in item.m2m_data.get(field.name, [])
+        ]
+        if rows:
+            self.tables.add(through._meta.db_table)
+            through.objects.bulk_create(rows)
+
+    def reset_sequences(self):
+        models = [apps.get_model(label) for label in EXPORTED_MODELS]
+        statements = connection.ops.sequence_reset_sql(self.style, models)
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
@@ -0,0 +1,32 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = ('Удаляет просроченные сессии небольшими пачками, не удерживая '
+            'блокировку записи надолго')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--pause', type=float, default=0.05,
+                            help='пауза в секундах между пачками, чтобы '
+                                 'успевали пройти другие записи')
+
+    def handle(self, *args, chunk_size, pause, **options):
+        now = timezone.now()
+        expired = Session.objects.filter(expire_date__lt=now)
+        deleted = 0
+        while True:
+            # Каждая пачка — отдельная короткая транзакция в autocommit.
+            keys = list(expired.order_by('expire_date').values_list(
+                'session_key', flat=True)[:chunk_size])
+            if not keys:
+                break
+            deleted += expired.filter(session_key__in=keys).delete()[0]
+            if len(keys) < chunk_size:
+                break
+            time.sleep(pause)
+        self.stdout.write(f'Удалено сессий: {deleted}')
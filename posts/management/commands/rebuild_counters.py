@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import Comment, Post, UserStats, count_related
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов, подписок и комментариев с нуля'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, batch_size, **options):
+        with transaction.atomic():
+            posts = Post.objects.update(
+                comments_count=count_related(Comment, 'post'))
+
+            UserStats.objects.all().delete()
+            batch = []
+            users = UserStats.objects.counted_users().iterator()
+            for user in users:
+                batch.append(UserStats(
+                    user_id=user.pk,
+                    posts_count=user.stats_posts,
+                    followers_count=user.stats_followers,
+                    following_count=user.stats_following))
+                if len(batch) >= batch_size:
+                    UserStats.objects.bulk_create(batch)
+                    batch = []
+            UserStats.objects.bulk_create(batch)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитаны счётчики: постов {posts}, '
+            f'пользователей {UserStats.objects.count()}'))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import search
+from posts.models import Comment, Post, SearchEntry
+
+
+class Command(BaseCommand):
+    help = 'Строит поисковый индекс постов и комментариев с нуля'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, batch_size, **options):
+        SearchEntry.objects.all().delete()
+        posts = self._index(Post.objects.only('pk', 'text'),
+                            search.index_post, batch_size)
+        comments = self._index(Comment.objects.only('pk', 'post', 'text'),
+                               search.index_comment, batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано постов: {posts}, комментариев: {comments}'))
+
+    def _index(self, queryset, index, batch_size):
+        count = 0
+        last_pk = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)
+                         .order_by('pk')[:batch_size])
+            if not batch:
+                return count
+            with transaction.atomic():
+                for obj in batch:
+                    index(obj)
+            count += len(batch)
+            last_pk = batch[-1].pk
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import Follow, TimelineEntry
+
+
+class Command(BaseCommand):
+    help = 'Заново собирает ленты подписок из таблицы подписок'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, batch_size, **options):
+        TimelineEntry.objects.all().delete()
+        follows = Follow.objects.order_by('pk').values_list(
+            'pk', 'user_id', 'author_id')
+        count = 0
+        last_pk = 0
+        while True:
+            batch = list(follows.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            with transaction.atomic():
+                for _, user_id, author_id in batch:
+                    TimelineEntry.objects.backfill(
+                        user_id, author_id, settings.TIMELINE_BACKFILL_SIZE)
+            count += len(batch)
+            last_pk = batch[-1][0]
+        self.stdout.write(self.style.SUCCESS(
+            f'Собраны ленты для подписок: {count}'))
@@ -0,0 +1,46 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from posts import instrumentation
+
+
+class Command(BaseCommand):
+    help = 'Выводит перцентили стоимости запросов по именам URL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true',
+                            help='вывести отчёт в JSON')
+        parser.add_argument('--sort', default='duration_ms',
+                            choices=['duration_ms', 'queries', 'sql_ms',
+                                     'template_ms', 'response_bytes'],
+                            help='по какому p90 упорядочить строки')
+
+    def handle(self, *args, sort, **options):
+        report = instrumentation.report()
+        if options['json']:
+            self.stdout.write(json.dumps(report, ensure_ascii=False,
+                                         indent=2))
+            return
+        if not report:
+            self.stdout.write('Замеров пока нет')
+            return
+
+        self.stdout.write(
+            f'{"url":<18} {"запросов":>8} {"p50, мс":>9} {"p90, мс":>9} '
+            f'{"p99, мс":>9} {"SQL":>5} {"SQL, мс":>8} {"шаблон, мс":>10} '
+            f'{"кэш":>6} {"байт":>8}')
+        rows = sorted(report.items(),
+                      key=lambda item: item[1][sort]['p90'], reverse=True)
+        for name, row in rows:
+            hit_rate = row['cache_hit_rate']
+            self.stdout.write(
+                f'{name:<18} {row["requests"]:>8} '
+                f'{row["duration_ms"]["p50"]:>9} '
+                f'{row["duration_ms"]["p90"]:>9} '
+                f'{row["duration_ms"]["p99"]:>9} '
+                f'{row["queries"]["p90"]:>5} '
+                f'{row["sql_ms"]["p90"]:>8} '
+                f'{row["template_ms"]["p90"]:>10} '
+                f'{"—" if hit_rate is None else f"{hit_rate:.0%}":>6} '
+                f'{row["response_bytes"]["p90"]:>8}')
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import rendering
+from posts.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает HTML текста постов и комментариев, '
+            'сохранённый старой версией рендера')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, batch_size, **options):
+        for model in (Post, Comment):
+            stale = (model.objects.exclude(
+                text_html_version=rendering.VERSION).order_by('pk'))
+            total = 0
+            last_pk = 0
+            while True:
+                batch = list(stale.filter(pk__gt=last_pk)
+                             .only('pk', 'text')[:batch_size])
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                for obj in batch:
+                    rendering.render_instance(obj)
+                with transaction.atomic():
+                    model.objects.bulk_update(
+                        batch, ['text_html', 'text_html_version'])
+                total += len(batch)
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.verbose_name_plural}: '
+                f'пересчитано {total}'))
@@ -0,0 +1,69 @@
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts import jobs
+
+
+def worker_loop(name, batch_size, poll):
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *args: stopping.append(True))
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    while not stopping:
+        if not jobs.work(name, batch_size):
+            time.sleep(poll)
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2)
+        parser.add_argument('--batch-size', type=int, default=10)
+        parser.add_argument('--poll', type=float, default=1.0,
+                            help='пауза в секундах, когда очередь пуста')
+        parser.add_argument('--once', action='store_true',
+                            help='выполнить всё, что есть, и выйти')
+
+    def handle(self, *args, processes, batch_size, poll, once, **options):
+        name = f'{socket.gethostname()}:{os.getpid()}'
+        if once:
+            done = 0
+            while True:
+                count = jobs.work(name, batch_size)
+                if not count:
+                    break
+                done += count
+            self.stdout.write(f'Обработано задач: {done}')
+            return
+
+        # Подключения родителя нельзя использовать после fork.
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        workers = [
+            context.Process(target=worker_loop,
+                            args=(f'{name}/{number}', batch_size, poll),
+                            name=f'run_jobs-{number}')
+            for number in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f'Запущено воркеров: {processes}')
+
+        def stop(*args):
+            for worker in workers:
+                worker.terminate()
+        signal.signal(signal.SIGTERM, stop)
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            stop()
+            for worker in workers:
+                worker.join()
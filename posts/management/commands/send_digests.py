@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts import digests
+
+
+class Command(BaseCommand):
+    help = ('Рассылает подписчикам дайджесты новых постов; '
+            'рассчитана на запуск по расписанию')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+                            help='писем на одно подключение к почте')
+        parser.add_argument('--max-posts', type=int,
+                            help='постов в одном письме')
+
+    def handle(self, *args, batch_size, max_posts, **options):
+        sent = digests.send_digests(batch_size=batch_size,
+                                    max_posts=max_posts)
+        self.stdout.write(self.style.SUCCESS(f'Отправлено писем: {sent}'))
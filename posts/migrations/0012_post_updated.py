@@ -0,0 +1,25 @@
+# Generated by Django 2.2.28 on 2026-10-18 02:06
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_updated(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Post.objects.update(updated=F('pub_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_searchentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='date updated'),
+        ),
+        migrations.RunPython(fill_updated, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 2.2.28 on 2026-10-18 02:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0014_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DigestWatermark',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='digest_watermark', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('sent_until', models.DateTimeField()),
+            ],
+        ),
+    ]
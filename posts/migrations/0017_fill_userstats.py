@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_related(model, field):
+    rows = (model.objects.filter(**{field: OuterRef('pk')})
+            .order_by().values(field).annotate(total=Count('pk'))
+            .values('total'))
+    return Coalesce(Subquery(rows, output_field=models.IntegerField()), 0)
+
+
+def fill_userstats(apps, schema_editor):
+    """Создаёт статистику всем пользователям, у кого её ещё нет.
+
+    Иначе первый просмотр профиля каждого старого пользователя пересчитывал
+    бы её и писал в базу прямо в GET-запросе.
+    """
+    app_label, model_name = settings.AUTH_USER_MODEL.split('.')
+    User = apps.get_model(app_label, model_name)
+    Post = apps.get_model('posts', 'Post')
+    Follow = apps.get_model('posts', 'Follow')
+    UserStats = apps.get_model('posts', 'UserStats')
+    users = (User.objects.filter(stats__isnull=True).annotate(
+        stats_posts=count_related(Post, 'author'),
+        stats_followers=count_related(Follow, 'author'),
+        stats_following=count_related(Follow, 'user')).iterator())
+    batch = []
+    for user in users:
+        batch.append(UserStats(
+            user_id=user.pk,
+            posts_count=user.stats_posts,
+            followers_count=user.stats_followers,
+            following_count=user.stats_following))
+        if len(batch) >= 1000:
+            UserStats.objects.bulk_create(batch)
+            batch = []
+    UserStats.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0016_text_html'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_userstats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def to_entries(apps, schema_editor):
+    """Переводит отметку с даты на последнюю уже разосланную запись."""
+    DigestWatermark = apps.get_model('posts', 'DigestWatermark')
+    TimelineEntry = apps.get_model('posts', 'TimelineEntry')
+    for watermark in DigestWatermark.objects.iterator():
+        last = TimelineEntry.objects.filter(
+            user_id=watermark.user_id,
+            pub_date__lte=watermark.sent_until,
+        ).aggregate(last=Max('pk'))['last']
+        if last:
+            DigestWatermark.objects.filter(pk=watermark.pk).update(
+                last_entry=last)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_fill_userstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='digestwatermark',
+            name='last_entry',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(to_entries, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='digestwatermark',
+            name='sent_until',
+        ),
+    ]
@@ -1,5 +1,10 @@
+from datetime import timedelta
+
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 
 User = get_user_model()
@@ -16,6 +21,12 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def feed(self):
+        """Посты для ленты вместе с автором и группой одним запросом."""
+        return self.select_related('author', 'group')
+
+
 class Post(models.Model):
     text = models.TextField(verbose_name='Текст статьи',
                             help_text='Добавьте текст статьи')
@@ -34,9 +45,22 @@ class Post(models.Model):
                               null=True,
                               verbose_name='Изображение',
                               help_text='Добавьте картинку')
+    comments_count = models.IntegerField(default=0, editable=False)
+    text_html = models.TextField(blank=True, editable=False)
+    text_html_version = models.IntegerField(default=0, editable=False)
+    updated = models.DateTimeField('date updated', auto_now=True,
+                                   db_index=True)
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_pub_date'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_pub_date'),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -49,10 +73,16 @@ class Comment(models.Model):
                                related_name='comments')
     text = models.TextField(verbose_name='Комментарий',
                             help_text='Добавьте комментарий')
+    text_html = models.TextField(blank=True, editable=False)
+    text_html_version = models.IntegerField(default=0, editable=False)
     created = models.DateTimeField('date published', auto_now_add=True)
 
     class Meta:
         ordering = ['-created']
+        indexes = [
+            models.Index(fields=['post', '-created', '-id'],
+                         name='comment_post_created'),
+        ]
 
 
 class Follow(models.Model):
@@ -67,3 +97,230 @@ class Follow(models.Model):
                 fields=["user", "author"],
                 name="unique_author_user_following")
         ]
+        indexes = [
+            models.Index(fields=['author', 'user'],
+                         name='follow_author_user'),
+        ]
+
+
+class TimelineEntryManager(models.Manager):
+    def fan_out(self, post, batch_size=1000):
+        """Раскладывает новый пост в ленты всех подписчиков автора."""
+        followers = (Follow.objects.filter(author_id=post.author_id)
+                     .values_list('user_id', flat=True).iterator())
+        batch = []
+        for user_id in followers:
+            batch.append(self.model(user_id=user_id, post=post,
+                                    author_id=post.author_id,
+                                    pub_date=post.pub_date))
+            if len(batch) >= batch_size:
+                self.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        self.bulk_create(batch, ignore_conflicts=True)
+
+    def backfill(self, user_id, author_id, limit):
+        """Добавляет в ленту подписчика последние посты автора."""
+        posts = (Post.objects.filter(author_id=author_id)
+                 .order_by('-pub_date', '-pk')
+                 .values_list('pk', 'pub_date')[:limit])
+        self.bulk_create([
+            self.model(user_id=user_id, post_id=post_id,
+                       author_id=author_id, pub_date=pub_date)
+            for post_id, pub_date in posts
+        ], ignore_conflicts=True)
+
+    def prune(self, user_id, author_id):
+        self.filter(user_id=user_id, author_id=author_id).delete()
+
+
+class TimelineEntry(models.Model):
+    """Пост в материализованной ленте подписок пользователя."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             related_name='timeline')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             related_name='timeline_entries')
+    author = models.ForeignKey(User, on_delete=models.CASCADE,
+                               related_name='+')
+    pub_date = models.DateTimeField()
+
+    objects = TimelineEntryManager()
+
+    class Meta:
+        ordering = ['-pub_date', '-post_id']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_user_post')
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'],
+                         name='timeline_user_pub_date'),
+            models.Index(fields=['user', 'author'],
+                         name='timeline_user_author'),
+        ]
+
+
+def count_related(model, field):
+    """Подзапрос с числом строк model, ссылающихся на внешний pk."""
+    rows = (model.objects.filter(**{field: OuterRef('pk')})
+            .order_by().values(field).annotate(total=Count('pk'))
+            .values('total'))
+    return Coalesce(Subquery(rows, output_field=models.IntegerField()), 0)
+
+
+class UserStatsManager(models.Manager):
+    def counted_users(self):
+        return User.objects.annotate(
+            stats_posts=count_related(Post, 'author'),
+            stats_followers=count_related(Follow, 'author'),
+            stats_following=count_related(Follow, 'user'),
+        )
+
+    def rebuild(self, user):
+        counted = (self.counted_users()
+                   .filter(pk=getattr(user, 'pk', user)).first())
+        if counted is None:
+            return None
+        stats, _ = self.update_or_create(
+            user_id=counted.pk,
+            defaults={'posts_count': counted.stats_posts,
+                      'followers_count': counted.stats_followers,
+                      'following_count': counted.stats_following})
+        return stats
+
+    def for_user(self, user):
+        try:
+            return self.get(user=user)
+        except self.model.DoesNotExist:
+            return self.rebuild(user)
+
+    def increment(self, user_id, **deltas):
+        updated = self.filter(user_id=user_id).update(**{
+            field: F(field) + delta for field, delta in deltas.items()
+        })
+        if not updated:
+            self.rebuild(user_id)
+
+    def decrement(self, user_id, **deltas):
+        """Уменьшает счётчики, только если строка статистики есть.
+
+        При удалении пользователя каскад удаляет его статистику раньше,
+        чем приходят сигналы об удалении постов и подписок; пересоздавать
+        её для удаляемого пользователя нельзя.
+        """
+        self.filter(user_id=user_id).update(**{
+            field: F(field) - delta for field, delta in deltas.items()
+        })
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE,
+                                primary_key=True,
+                                related_name='stats')
+    posts_count = models.IntegerField(default=0)
+    followers_count = models.IntegerField(default=0)
+    following_count = models.IntegerField(default=0)
+
+    objects = UserStatsManager()
+
+    def __str__(self):
+        return f'{self.user}: {self.posts_count}'
+
+
+class SearchEntry(models.Model):
+    """Запись инвертированного индекса: основа слова в посте.
+
+    Если ``comment`` заполнен, слово встретилось в этом комментарии к посту.
+    """
+    term = models.CharField(max_length=64)
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             related_name='search_entries')
+    comment = models.ForeignKey(Comment, on_delete=models.CASCADE,
+                                blank=True, null=True,
+                                related_name='search_entries')
+    weight = models.IntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['term', 'post'], name='search_term_post'),
+        ]
+
+
+class JobManager(models.Manager):
+    def claim(self, worker, limit, timeout):
+        """Забирает до ``limit`` готовых к запуску задач для ``worker``.
+
+        Задачи, которые дольше ``timeout`` висят в работе (воркер умер),
+        считаются свободными; если попытки у такой задачи кончились, она
+        помечается проваленной, иначе задача, роняющая воркер, крутилась бы
+        бесконечно. Повторная проверка статуса в UPDATE не даёт двум
+        воркерам забрать одну задачу.
+        """
+        now = timezone.now()
+        stale = models.Q(status=Job.RUNNING,
+                         locked_at__lt=now - timedelta(seconds=timeout))
+        self.filter(stale, attempts__gte=F('max_attempts')).update(
+            status=Job.FAILED,
+            last_error='Воркер не завершил последнюю попытку')
+        free = (models.Q(status=Job.QUEUED, run_at__lte=now)
+                | stale & models.Q(attempts__lt=F('max_attempts')))
+        ids = list(self.filter(free).order_by('run_at', 'pk')
+                   .values_list('pk', flat=True)[:limit])
+        if not ids:
+            return []
+        self.filter(free, pk__in=ids).update(
+            status=Job.RUNNING, locked_by=worker, locked_at=now,
+            attempts=F('attempts') + 1)
+        return list(self.filter(pk__in=ids, status=Job.RUNNING,
+                                locked_by=worker, locked_at=now))
+
+
+class Job(models.Model):
+    """Фоновая задача: вызов ``task(**kwargs)`` в воркере ``run_jobs``."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = [
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Не удалась'),
+    ]
+
+    task = models.CharField(max_length=200)
+    kwargs = models.TextField(default='{}')
+    status = models.CharField(max_length=10, choices=STATUSES,
+                              default=QUEUED)
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    objects = JobManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at'],
+                         name='job_status_run_at'),
+        ]
+
+    def __str__(self):
+        return f'{self.task} ({self.status})'
+
+
+class DigestWatermark(models.Model):
+    """До какой записи ленты посты уже попали в письма-дайджесты подписчику.
+
+    Отметка — ``pk`` записи ``TimelineEntry``, а не дата: ленты наполняет
+    фоновая задача, и запись с ранней ``pub_date`` может появиться уже после
+    рассылки, а ``pk`` растёт в порядке вставки.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE,
+                                primary_key=True,
+                                related_name='digest_watermark')
+    last_entry = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.user}: {self.last_entry}'
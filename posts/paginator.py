@@ -0,0 +1,146 @@
+import base64
+import binascii
+from collections.abc import Sequence
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+POSTS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 20
+
+
+def encode_cursor(value, pk):
+    raw = f'{value.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Разбирает курсор вида ``<дата>|<id>``, при ошибке возвращает None."""
+    if not cursor:
+        return None
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(cursor + padding).decode()
+        value, pk = raw.rsplit('|', 1)
+        value = parse_datetime(value)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if value is None:
+        return None
+    return value, pk
+
+
+class CursorPage(Sequence):
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    def next_cursor(self):
+        if not self._has_next:
+            return None
+        return self.paginator.cursor_for(self.object_list[-1])
+
+    def previous_cursor(self):
+        if not self._has_previous:
+            return None
+        return self.paginator.cursor_for(self.object_list[0])
+
+
+class CursorPaginator:
+    """Пагинация по ключу (поле, id) без COUNT(*) и OFFSET.
+
+    Каждая страница выбирается одним запросом по индексу поля: следующая
+    страница начинается строго после последней записи текущей.
+
+    ``transform`` превращает выбранные строки в объекты страницы (например,
+    записи ленты в посты); у результата ``field`` и ``pk`` должны совпадать
+    со значениями ``field`` и ``tiebreak`` исходной строки.
+    """
+
+    def __init__(self, object_list, per_page, field='pub_date',
+                 tiebreak='pk', transform=None):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.field = field
+        self.tiebreak = tiebreak
+        self.transform = transform
+
+    def cursor_for(self, obj):
+        return encode_cursor(getattr(obj, self.field), obj.pk)
+
+    def _seek(self, position, lookup):
+        value, pk = position
+        return (Q(**{f'{self.field}__{lookup}': value})
+                | Q(**{self.field: value, f'{self.tiebreak}__{lookup}': pk}))
+
+    def get_page(self, after=None, before=None):
+        after = decode_cursor(after)
+        before = decode_cursor(before) if after is None else None
+        limit = self.per_page + 1
+
+        if before is not None:
+            queryset = self.object_list.filter(self._seek(before, 'gt'))
+            rows = list(queryset.order_by(self.field, self.tiebreak)[:limit])
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            rows.reverse()
+            return self._page(rows, has_next=True, has_previous=has_previous)
+
+        queryset = self.object_list
+        if after is not None:
+            queryset = queryset.filter(self._seek(after, 'lt'))
+        rows = list(
+            queryset.order_by(f'-{self.field}', f'-{self.tiebreak}')[:limit])
+        has_next = len(rows) > self.per_page
+        return self._page(rows[:self.per_page], has_next=has_next,
+                          has_previous=after is not None)
+
+    def _page(self, rows, has_next, has_previous):
+        if self.transform is not None:
+            rows = self.transform(rows)
+        return CursorPage(rows, self, has_next=has_next,
+                          has_previous=has_previous)
+
+
+def paginate(request, object_list, per_page=POSTS_PER_PAGE, **options):
+    """Возвращает (paginator, page) для ленты.
+
+    Старые ссылки вида ``?page=N`` обслуживаются обычным Paginator,
+    всё остальное — курсорной пагинацией по ``?after=``/``?before=``.
+    """
+    page_number = request.GET.get('page')
+    if page_number is not None:
+        paginator = Paginator(object_list, per_page)
+        page = paginator.get_page(page_number)
+        if options.get('transform') is not None:
+            page.object_list = options['transform'](page.object_list)
+        return paginator, page
+
+    paginator = CursorPaginator(object_list, per_page, **options)
+    page = paginator.get_page(after=request.GET.get('after'),
+                              before=request.GET.get('before'))
+    return paginator, page
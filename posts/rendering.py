@@ -0,0 +1,28 @@
+"""HTML текста постов и комментариев, готовый к выводу в шаблоне.
+
+HTML считается один раз при сохранении записи (сигнал ``pre_save`` в
+``posts.signals``) и хранится в ``text_html`` вместе с
+``text_html_version``. При изменении ``render`` нужно увеличить ``VERSION``
+и пересчитать старые записи командой ``rerender_text``; пока она не
+отработала, устаревшие записи рендерятся на лету.
+"""
+from django.template.defaultfilters import linebreaksbr
+from django.utils.safestring import mark_safe
+
+VERSION = 1
+
+
+def render(text):
+    return linebreaksbr(text, autoescape=True)
+
+
+def render_instance(obj):
+    obj.text_html = render(obj.text)
+    obj.text_html_version = VERSION
+
+
+def html(obj):
+    """Сохранённый HTML, если он актуален, иначе свежий рендер."""
+    if obj.text_html_version == VERSION:
+        return mark_safe(obj.text_html)
+    return render(obj.text)
@@ -0,0 +1,208 @@
+"""Полнотекстовый поиск по постам и комментариям.
+
+Инвертированный индекс хранится в модели ``SearchEntry``: для каждого поста
+и комментария — основы слов и число их вхождений. Основы выделяются
+стеммером Портера для русского языка (алгоритм Snowball), поэтому «котики»
+находят «котик» и «котиков».
+"""
+import math
+import re
+
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Sum, Value, When
+
+from .models import Post, SearchEntry
+
+POST_WEIGHT = 3
+COMMENT_WEIGHT = 1
+MAX_TERM_LENGTH = 64
+
+WORD_RE = re.compile(r'\w+')
+CYRILLIC_RE = re.compile(r'^[а-я]+$')
+
+STOP_WORDS = frozenset('''
+    а без более бы был была были было быть в вам вас весь во вот все всего
+    всех вы где да даже для до его ее ей ему если есть еще же за здесь и из
+    или им их к как какой когда кто ли либо мне может мы на над надо наш не
+    него нее нет ни них но ну о об однако он она они оно от очень по под
+    при про с со так также такой там те тем то того тоже той только том
+    ты у уже хотя чего чей чем что чтобы чье чья эта эти это этот я
+'''.split())
+
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = (
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+ADJECTIVE = (
+    'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+    'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+    'ая', 'яя', 'ою', 'ею',
+)
+PARTICIPLE = (
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+REFLEXIVE = ('ся', 'сь')
+VERB = (
+    ('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет',
+     'ют', 'ны', 'ть', 'ешь', 'нно'),
+    ('ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй',
+     'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует', 'уют',
+     'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю'),
+)
+NOUN = (
+    'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+    'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+    'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+    'ья', 'я',
+)
+SUPERLATIVE = ('ейше', 'ейш')
+DERIVATIONAL = ('ость', 'ост')
+
+
+def _by_length(endings):
+    return sorted(endings, key=len, reverse=True)
+
+
+def _region(word, start=0):
+    """Начало области после первой пары «гласная — согласная»."""
+    for i in range(start + 1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            return i + 1
+    return len(word)
+
+
+def _strip(word, start, endings, after_a=False):
+    """Отрезает самое длинное окончание, начинающееся не раньше start.
+
+    С ``after_a`` окончание должно стоять после «а» или «я», которые
+    сами остаются в слове.
+    """
+    for ending in _by_length(endings):
+        if not word.endswith(ending):
+            continue
+        position = len(word) - len(ending)
+        if position < start:
+            continue
+        if after_a and (position - 1 < start
+                        or word[position - 1] not in 'ая'):
+            continue
+        return word[:position]
+    return None
+
+
+def _strip_grouped(word, start, groups):
+    first, second = groups
+    candidates = [
+        result for result in (_strip(word, start, first, after_a=True),
+                              _strip(word, start, second))
+        if result is not None
+    ]
+    return min(candidates, key=len) if candidates else None
+
+
+def stem(word):
+    """Основа русского слова по алгоритму Snowball."""
+    word = word.lower().replace('ё', 'е')
+    if not CYRILLIC_RE.match(word):
+        return word
+
+    rv = next((i + 1 for i, char in enumerate(word) if char in VOWELS),
+              len(word))
+    r2 = _region(word, _region(word))
+
+    stripped = _strip_grouped(word, rv, PERFECTIVE_GERUND)
+    if stripped is None:
+        word = _strip(word, rv, REFLEXIVE) or word
+        stripped = _strip(word, rv, ADJECTIVE)
+        if stripped is not None:
+            stripped = _strip_grouped(stripped, rv, PARTICIPLE) or stripped
+        else:
+            stripped = (_strip_grouped(word, rv, VERB)
+                        or _strip(word, rv, NOUN))
+    if stripped is not None:
+        word = stripped
+
+    if word.endswith('и') and len(word) - 1 >= rv:
+        word = word[:-1]
+
+    word = _strip(word, r2, DERIVATIONAL) or word
+
+    if word.endswith('нн') and len(word) - 2 >= rv:
+        word = word[:-1]
+    else:
+        superlative = _strip(word, rv, SUPERLATIVE)
+        if superlative is not None:
+            word = superlative
+            if word.endswith('нн'):
+                word = word[:-1]
+        elif word.endswith('ь') and len(word) - 1 >= rv:
+            word = word[:-1]
+    return word
+
+
+def tokenize(text):
+    """Основы значимых слов текста в порядке появления."""
+    terms = []
+    for word in WORD_RE.findall(text.lower()):
+        if word in STOP_WORDS or word.isdigit() and len(word) < 2:
+            continue
+        term = stem(word)[:MAX_TERM_LENGTH]
+        if term:
+            terms.append(term)
+    return terms
+
+
+def _entries(text, weight, **source):
+    counts = {}
+    for term in tokenize(text):
+        counts[term] = counts.get(term, 0) + weight
+    return [SearchEntry(term=term, weight=total, **source)
+            for term, total in counts.items()]
+
+
+@transaction.atomic
+def index_post(post):
+    SearchEntry.objects.filter(post=post, comment__isnull=True).delete()
+    SearchEntry.objects.bulk_create(
+        _entries(post.text, POST_WEIGHT, post=post))
+
+
+@transaction.atomic
+def index_comment(comment):
+    SearchEntry.objects.filter(comment=comment).delete()
+    SearchEntry.objects.bulk_create(_entries(
+        comment.text, COMMENT_WEIGHT,
+        post_id=comment.post_id, comment=comment))
+
+
+def search(query):
+    """Посты, содержащие все слова запроса, от более релевантных.
+
+    Возвращает queryset словарей ``{'post': id, 'score': ...}``; вес
+    слова в посте умножается на его IDF, чтобы редкие слова значили больше.
+    """
+    terms = sorted(set(tokenize(query)))
+    if not terms:
+        return SearchEntry.objects.none().values('post')
+
+    total = Post.objects.count() or 1
+    frequencies = dict(
+        SearchEntry.objects.filter(term__in=terms).values('term')
+        .annotate(posts=Count('post', distinct=True))
+        .values_list('term', 'posts'))
+    idf = {term: math.log(1 + total / frequencies.get(term, 1))
+           for term in terms}
+
+    score = Sum(Case(
+        *[When(term=term, then=F('weight') * Value(idf[term]))
+          for term in terms],
+        output_field=FloatField(),
+    ))
+    return (SearchEntry.objects.filter(term__in=terms)
+            .values('post')
+            .annotate(matched=Count('term', distinct=True), score=score)
+            .filter(matched=len(terms))
+            .order_by('-score', '-post'))
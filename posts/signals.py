@@ -0,0 +1,189 @@
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.utils import timezone
+from django.dispatch import receiver
+
+from . import cache, follows, jobs, rendering, tasks
+from .models import Comment, Follow, Group, Post, TimelineEntry, UserStats
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def user_created(sender, instance, created, raw=False, **kwargs):
+    # Статистика есть у каждого пользователя заранее, чтобы просмотр
+    # профиля не писал в базу.
+    if created and not raw:
+        UserStats.objects.get_or_create(user_id=instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserStats.objects.increment(instance.author_id, posts_count=1)
+        jobs.enqueue(tasks.fan_out, post_id=instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        jobs.enqueue(tasks.index_post, unique=True, post_id=instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    UserStats.objects.decrement(instance.author_id, posts_count=1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Post.objects.filter(pk=instance.post_id).update(
+            comments_count=F('comments_count') + 1, updated=timezone.now())
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        jobs.enqueue(tasks.index_comment, unique=True,
+                     comment_id=instance.pk)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    Post.objects.filter(pk=instance.post_id).update(
+        comments_count=F('comments_count') - 1, updated=timezone.now())
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserStats.objects.increment(instance.author_id, followers_count=1)
+        UserStats.objects.increment(instance.user_id, following_count=1)
+        jobs.enqueue(tasks.backfill, user_id=instance.user_id,
+                     author_id=instance.author_id)
+    if not raw:
+        follows.invalidate(instance.user_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    UserStats.objects.decrement(instance.author_id, followers_count=1)
+    UserStats.objects.decrement(instance.user_id, following_count=1)
+    TimelineEntry.objects.prune(instance.user_id, instance.author_id)
+    follows.invalidate(instance.user_id)
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Comment)
+def text_rendering(sender, instance, update_fields=None, **kwargs):
+    # HTML считается при любом сохранении — из форм, админки, кода и
+    # loaddata, иначе шаблон показал бы старый текст. Сохранение отдельных
+    # полей без текста HTML не меняет.
+    if update_fields is None or 'text' in update_fields:
+        rendering.render_instance(instance)
+
+
+# Версии областей кэша сдвигаются здесь, а не в представлениях, чтобы
+# правки через админку и ORM тоже сбрасывали кэш страниц и ETag.
+
+@receiver(pre_save, sender=Post)
+def post_group_changing(sender, instance, raw=False, **kwargs):
+    if not raw and not instance._state.adding:
+        instance._old_group_slug = (
+            Group.objects.filter(groups=instance.pk)
+            .values_list('slug', flat=True).first())
+
+
+@receiver(post_save, sender=Post)
+def post_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    old_slug = getattr(instance, '_old_group_slug', None)
+    if old_slug is not None:
+        cache.bump_post(instance, cache.group_scope(old_slug))
+    else:
+        cache.bump_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_removed(sender, instance, **kwargs):
+    cache.bump_post(instance)
+
+
+def bump_comment_post(comment):
+    post = (Post.objects.select_related('author', 'group')
+            .filter(pk=comment.post_id).first())
+    # Пост удаляется вместе с комментариями — его сбросит post_removed.
+    if post is not None:
+        cache.bump_post(post)
+
+
+@receiver(post_save, sender=Comment)
+def comment_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_comment_post(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_removed(sender, instance, **kwargs):
+    bump_comment_post(instance)
+
+
+def bump_follow_profiles(follow):
+    usernames = User.objects.filter(
+        pk__in=[follow.user_id, follow.author_id]).values_list(
+            'username', flat=True)
+    cache.bump(*[cache.author_scope(username) for username in usernames])
+
+
+@receiver(post_save, sender=Follow)
+def follow_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_follow_profiles(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_removed(sender, instance, **kwargs):
+    bump_follow_profiles(instance)
+
+
+def group_page_scopes(group):
+    """Области страниц, на которых видно название группы."""
+    posts = list(Post.objects.filter(group=group)
+                 .values_list('pk', 'author__username'))
+    authors = {username for _, username in posts}
+    return [cache.index_scope(), cache.group_scope(group.slug),
+            *[cache.author_scope(username) for username in authors],
+            *[cache.post_scope(pk) for pk, _ in posts]]
+
+
+@receiver(pre_save, sender=Group)
+def group_slug_changing(sender, instance, raw=False, **kwargs):
+    if not raw and not instance._state.adding:
+        instance._old_slug = (Group.objects.filter(pk=instance.pk)
+                              .values_list('slug', flat=True).first())
+
+
+@receiver(post_save, sender=Group)
+def group_changed(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    scopes = group_page_scopes(instance)
+    old_slug = getattr(instance, '_old_slug', None)
+    if old_slug is not None and old_slug != instance.slug:
+        scopes.append(cache.group_scope(old_slug))
+    cache.bump(*scopes)
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleting(sender, instance, **kwargs):
+    # После удаления у постов уже не будет ссылки на группу.
+    instance._page_scopes = group_page_scopes(instance)
+
+
+@receiver(post_delete, sender=Group)
+def group_removed(sender, instance, **kwargs):
+    cache.bump(*getattr(instance, '_page_scopes', []))
@@ -0,0 +1,34 @@
+"""Фоновые задачи, которые сигналы моделей ставят в очередь ``posts.jobs``.
+
+Задачи получают только ID: к моменту выполнения объект мог измениться
+или исчезнуть, поэтому он перечитывается из базы.
+"""
+from django.conf import settings
+
+from . import search
+from .models import Comment, Follow, Post, TimelineEntry
+
+
+def fan_out(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        TimelineEntry.objects.fan_out(post)
+
+
+def backfill(user_id, author_id):
+    # Подписку могли отменить, пока задача ждала в очереди.
+    if Follow.objects.filter(user_id=user_id, author_id=author_id).exists():
+        TimelineEntry.objects.backfill(user_id, author_id,
+                                       settings.TIMELINE_BACKFILL_SIZE)
+
+
+def index_post(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        search.index_post(post)
+
+
+def index_comment(comment_id):
+    comment = Comment.objects.filter(pk=comment_id).first()
+    if comment is not None:
+        search.index_comment(comment)
@@ -0,0 +1,11 @@
+from django import template
+
+from posts import rendering
+
+register = template.Library()
+
+
+@register.filter
+def text_html(obj):
+    """HTML текста поста или комментария, посчитанный при сохранении."""
+    return rendering.html(obj)
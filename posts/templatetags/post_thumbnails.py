@@ -0,0 +1,17 @@
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def ready_thumbnail(image, size):
+    """Готовая миниатюра или None.
+
+    Рендеринг только читает: миниатюры ставят в очередь new_post и
+    post_edit, для старых картинок — manage.py generate_thumbnails.
+    """
+    if not image:
+        return None
+    return thumbnails.get_ready(image, size)
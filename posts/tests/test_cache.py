@@ -0,0 +1,100 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class ViewCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.group = Group.objects.create(title='Группа', slug='group')
+        self.post = Post.objects.create(
+            text='Первый пост', author=self.author, group=self.group)
+
+    def test_feeds_are_cached(self):
+        """Ленты отдаются из кэша, пока их никто не изменил"""
+        urls = [reverse('index'), reverse('group', args=['group']),
+                reverse('profile', args=['author'])]
+        for url in urls:
+            self.client.get(url)
+        # bulk_create не шлёт сигналов, поэтому версии кэша не меняются.
+        Post.objects.bulk_create([Post(
+            text='Пост мимо сигналов', author=self.author,
+            group=self.group)])
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertIsNone(response.context)
+                self.assertNotContains(response, 'Пост мимо сигналов')
+
+    def test_page_number_is_part_of_key(self):
+        """Разные страницы ленты кэшируются отдельно"""
+        self.client.get(reverse('index'))
+        second = self.client.get(reverse('index'), {'page': 2})
+        self.assertIsNotNone(second.context)
+
+    def test_new_post_invalidates_feeds(self):
+        """Новый пост сбрасывает кэш главной, группы и профиля"""
+        urls = [reverse('index'), reverse('group', args=['group']),
+                reverse('profile', args=['author'])]
+        for url in urls:
+            self.client.get(url)
+        self.author_client.post(
+            reverse('new_post'),
+            {'text': 'Свежий пост', 'group': self.group.id})
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'Свежий пост')
+
+    def test_comment_invalidates_post_page(self):
+        """Комментарий сбрасывает кэш страницы поста"""
+        url = reverse('post', args=['author', self.post.id])
+        self.client.get(url)
+        self.author_client.post(
+            reverse('add_comment', args=['author', self.post.id]),
+            {'text': 'Свежий комментарий'})
+        self.assertContains(self.client.get(url), 'Свежий комментарий')
+
+    def test_authorized_pages_are_not_cached(self):
+        """Страницы авторизованных пользователей не кэшируются"""
+        self.author_client.get(reverse('index'))
+        response = self.author_client.get(reverse('index'))
+        self.assertIsNotNone(response.context)
+
+    def test_orm_writes_invalidate_pages(self):
+        """Правки через ORM и админку тоже сбрасывают кэш страниц"""
+        post_url = reverse('post', args=['author', self.post.id])
+        urls = [reverse('index'), reverse('group', args=['group']),
+                reverse('profile', args=['author']), post_url]
+
+        def check(text, changed_urls):
+            for url in changed_urls:
+                with self.subTest(text=text, url=url):
+                    self.assertContains(self.client.get(url), text)
+
+        for url in urls:
+            self.client.get(url)
+        self.post.text = 'Исправленный текст'
+        self.post.save()
+        check('Исправленный текст', urls)
+
+        Comment.objects.create(post=self.post, author=self.author,
+                               text='Комментарий из админки')
+        check('Комментарий из админки', [post_url])
+
+        self.group.title = 'Новое название'
+        self.group.save()
+        check('Новое название', urls)
+
+        Post.objects.create(text='Второй пост', author=self.author)
+        self.client.get(reverse('index'))
+        Post.objects.filter(text='Второй пост').get().delete()
+        self.assertNotContains(self.client.get(reverse('index')),
+                               'Второй пост')
@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Comment, Post
+from posts.paginator import COMMENTS_PER_PAGE
+
+User = get_user_model()
+
+
+class CommentPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+        readers = [User.objects.create_user(username=f'reader{i}')
+                   for i in range(5)]
+        now = timezone.now()
+        total = COMMENTS_PER_PAGE * 2 + 5
+        for i in range(total):
+            comment = Comment.objects.create(
+                post=cls.post, author=readers[i % 5], text=f'Комментарий {i}')
+            Comment.objects.filter(pk=comment.pk).update(
+                created=now - timedelta(minutes=total - i))
+        cls.total = total
+
+    def setUp(self):
+        cache.clear()
+        self.post_url = reverse('post', args=['author', self.post.id])
+        self.comments_url = reverse('post_comments',
+                                    args=['author', self.post.id])
+
+    def test_first_page_is_bounded(self):
+        """Страница поста показывает только первую страницу комментариев"""
+        response = self.client.get(self.post_url)
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COMMENTS_PER_PAGE)
+        self.assertEqual(comments[0].text, f'Комментарий {self.total - 1}')
+        self.assertContains(response, 'Показать ещё')
+
+    def test_authors_are_joined(self):
+        """Авторы комментариев не запрашиваются по одному"""
+        with self.assertNumQueries(2):
+            self.client.get(self.comments_url)
+
+    def test_fragments_cover_all_comments(self):
+        """Фрагменты по курсору отдают все комментарии без повторов"""
+        seen, after = [], None
+        while True:
+            params = {'format': 'json'}
+            if after:
+                params['after'] = after
+            data = self.client.get(self.comments_url, params).json()
+            seen += [comment['id'] for comment in data['comments']]
+            after = data['next']
+            if after is None:
+                break
+        self.assertEqual(len(seen), self.total)
+        self.assertEqual(len(set(seen)), self.total)
+
+    def test_html_fragment(self):
+        """Без format=json отдаётся HTML-фрагмент без обвязки страницы"""
+        response = self.client.get(self.comments_url)
+        self.assertTemplateUsed(response, 'includes/comment_list.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertContains(response, 'js-more-comments')
@@ -0,0 +1,92 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.group = Group.objects.create(title='Группа', slug='group')
+        self.post = Post.objects.create(
+            text='Пост', author=self.author, group=self.group)
+        self.urls = [
+            reverse('index'),
+            reverse('group', args=['group']),
+            reverse('profile', args=['author']),
+            reverse('post', args=['author', self.post.id]),
+        ]
+
+    def revalidate(self, client, url):
+        response = client.get(url)
+        return client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_unchanged_pages_return_304(self):
+        """Неизменившиеся страницы отдают 304 без рендеринга шаблонов"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.revalidate(self.client, url)
+                self.assertEqual(response.status_code, 304)
+                self.assertIsNone(response.context)
+
+    def test_edit_changes_validators(self):
+        """Правка поста меняет ETag"""
+        url = reverse('post', args=['author', self.post.id])
+        before = self.client.get(url)
+        self.author_client.post(
+            reverse('post_edit', args=['author', self.post.id]),
+            {'text': 'Исправленный пост', 'group': self.group.id})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=before['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Исправленный пост')
+        self.post.refresh_from_db()
+        self.assertGreater(self.post.updated, self.post.pub_date)
+
+    def test_comment_changes_post_page(self):
+        """Новый комментарий меняет ETag страницы поста"""
+        url = reverse('post', args=['author', self.post.id])
+        etag = self.client.get(url)['ETag']
+        Comment.objects.create(post=self.post, author=self.author,
+                               text='Комментарий')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_user(self):
+        """Разные пользователи не получают чужую версию страницы"""
+        url = reverse('index')
+        etag = self.client.get(url)['ETag']
+        response = self.author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Cookie', response['Vary'])
+
+    def test_no_last_modified(self):
+        """Last-Modified не отдаётся: после удаления поста он ушёл бы назад"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertFalse(
+                    self.client.get(url).has_header('Last-Modified'))
+
+    def test_delete_changes_index(self):
+        """Удаление самого свежего поста меняет ETag ленты"""
+        Post.objects.create(text='Старый пост', author=self.author)
+        url = reverse('index')
+        etag = self.client.get(url)['ETag']
+        self.post.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_csrf_cookie(self):
+        """Новый CSRF-токен не даёт 304 со старой формой на странице"""
+        url = reverse('post', args=['author', self.post.id])
+        etag = self.author_client.get(url)['ETag']
+        self.author_client.cookies[settings.CSRF_COOKIE_NAME] = 'a' * 64
+        response = self.author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
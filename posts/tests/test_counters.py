@@ -0,0 +1,107 @@
+from importlib import import_module
+from io import StringIO
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Post, UserStats
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_counters_follow_writes(self):
+        """Счётчики обновляются при записи постов, комментариев и подписок"""
+        self.author_client.post(reverse('new_post'), {'text': 'Пост'})
+        post = Post.objects.get()
+        self.reader_client.post(
+            reverse('add_comment', args=['author', post.id]),
+            {'text': 'Комментарий'}
+        )
+        self.reader_client.get(reverse('profile_follow', args=['author']))
+
+        author_stats = UserStats.objects.get(user=self.author)
+        reader_stats = UserStats.objects.get(user=self.reader)
+        self.assertEqual(author_stats.posts_count, 1)
+        self.assertEqual(author_stats.followers_count, 1)
+        self.assertEqual(reader_stats.following_count, 1)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+
+        self.reader_client.get(reverse('profile_unfollow', args=['author']))
+        author_stats.refresh_from_db()
+        reader_stats.refresh_from_db()
+        self.assertEqual(author_stats.followers_count, 0)
+        self.assertEqual(reader_stats.following_count, 0)
+
+    def test_profile_renders_stored_counters(self):
+        """Профиль берёт счётчики из UserStats"""
+        Post.objects.create(text='Пост', author=self.author)
+        UserStats.objects.filter(user=self.author).update(posts_count=42)
+        response = self.client.get(reverse('profile', args=['author']))
+        self.assertEqual(response.context['posts_count'], 42)
+
+    def test_rebuild_counters_repairs_drift(self):
+        """Команда rebuild_counters пересчитывает счётчики с нуля"""
+        post = Post.objects.create(text='Пост', author=self.author)
+        Comment.objects.create(post=post, author=self.reader, text='Текст')
+        UserStats.objects.filter(user=self.author).update(posts_count=7)
+        Post.objects.update(comments_count=5)
+
+        call_command('rebuild_counters', stdout=StringIO())
+
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).posts_count, 1)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+
+    def test_deleting_user_with_posts_and_follows(self):
+        """Пользователь с постами и подписками удаляется без ошибок"""
+        other = User.objects.create_user(username='other')
+        Post.objects.create(text='Пост', author=self.author)
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.author, author=other)
+
+        self.author.delete()
+
+        self.assertFalse(UserStats.objects.filter(
+            user_id=self.author.pk).exists())
+        self.assertEqual(
+            UserStats.objects.get(user=self.reader).following_count, 0)
+        self.assertEqual(
+            UserStats.objects.get(user=other).followers_count, 0)
+
+    def test_profile_view_does_not_write(self):
+        """У нового пользователя уже есть статистика, профиль только читает"""
+        self.assertTrue(UserStats.objects.filter(user=self.author).exists())
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get(reverse('profile', args=['author']))
+        self.assertFalse([query for query in captured
+                          if not query['sql'].startswith('SELECT')])
+
+    def test_migration_fills_missing_stats(self):
+        """Миграция создаёт статистику старым пользователям"""
+        Post.objects.create(text='Пост', author=self.author)
+        Follow.objects.create(user=self.reader, author=self.author)
+        UserStats.objects.all().delete()
+
+        migration = import_module('posts.migrations.0017_fill_userstats')
+        migration.fill_userstats(apps, None)
+
+        stats = UserStats.objects.get(user=self.author)
+        self.assertEqual((stats.posts_count, stats.followers_count), (1, 1))
+        self.assertEqual(
+            UserStats.objects.get(user=self.reader).following_count, 1)
@@ -0,0 +1,87 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from posts import digests
+from posts.models import DigestWatermark, Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+# Ленты и поисковый индекс обновляются фоновыми задачами.
+@override_settings(JOBS_EAGER=True)
+class DigestTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com')
+        self.readers = [
+            User.objects.create_user(username=f'reader{i}',
+                                     email=f'reader{i}@example.com')
+            for i in range(3)]
+        for reader in self.readers:
+            Follow.objects.create(user=reader, author=self.author)
+
+    def test_digest_per_follower(self):
+        """Каждый подписчик получает одно письмо со всеми новыми постами"""
+        for i in range(3):
+            Post.objects.create(text=f'Новость {i}', author=self.author)
+        self.assertEqual(digests.send_digests(), 3)
+        self.assertEqual(len(mail.outbox), 3)
+        body = mail.outbox[0].body
+        for i in range(3):
+            self.assertIn(f'Новость {i}', body)
+
+    def test_posts_are_sent_once(self):
+        """Повторный запуск не присылает уже отправленные посты"""
+        Post.objects.create(text='Новость', author=self.author)
+        digests.send_digests()
+        mail.outbox.clear()
+        self.assertEqual(digests.send_digests(), 0)
+
+        Post.objects.create(text='Ещё новость', author=self.author)
+        digests.send_digests()
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertNotIn('Новость\n', mail.outbox[0].body)
+        self.assertIn('Ещё новость', mail.outbox[0].body)
+
+    def test_late_fan_out_is_not_lost(self):
+        """Запись, разложенная в ленту после рассылки, уйдёт следующей"""
+        with self.settings(JOBS_EAGER=False):
+            post = Post.objects.create(text='Поздняя новость',
+                                       author=self.author)
+        self.assertEqual(digests.send_digests(), 0)
+        # Фоновая задача отработала позже: pub_date записи уже в прошлом.
+        TimelineEntry.objects.fan_out(post)
+        self.assertEqual(digests.send_digests(), 3)
+        self.assertIn('Поздняя новость', mail.outbox[0].body)
+
+    def test_old_history_is_skipped(self):
+        """Новичкам не приходит вся старая история ленты"""
+        Post.objects.create(text='Старая новость', author=self.author)
+        later = timezone.now() + timedelta(days=2)
+        self.assertEqual(digests.send_digests(now=later), 0)
+        self.assertEqual(DigestWatermark.objects.count(), 4)
+
+    def test_posts_per_email_are_capped(self):
+        """Число постов в письме ограничено, остальные — ссылкой на ленту"""
+        for i in range(5):
+            Post.objects.create(text=f'Новость {i}', author=self.author)
+        digests.send_digests(max_posts=2)
+        body = mail.outbox[0].body
+        self.assertEqual(body.count('Новость'), 2)
+        self.assertIn('И ещё 3', body)
+
+    def test_one_connection_per_batch(self):
+        """На пачку писем открывается одно подключение к почте"""
+        Post.objects.create(text='Новость', author=self.author)
+        with mock.patch('posts.digests.get_connection',
+                        wraps=mail.get_connection) as get_connection:
+            call_command('send_digests', batch_size=2, stdout=mock.Mock())
+        # Четыре пользователя с почтой — две пачки.
+        self.assertEqual(get_connection.call_count, 2)
+        self.assertEqual(len(mail.outbox), 3)
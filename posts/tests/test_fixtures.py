@@ -0,0 +1,125 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import TestCase
+
+from posts.fixtures import iter_array
+from posts.models import (Comment, Follow, Group, Post, SearchEntry,
+                          TimelineEntry, UserStats)
+
+User = get_user_model()
+
+
+class StreamingReaderTests(TestCase):
+    def test_resume_from_offset(self):
+        """Разбор продолжается с сохранённого смещения"""
+        data = '[{"a": "ё"}, {"b": 2} ,\n{"c": [3]}]'.encode()
+        items = list(iter_array(io.BytesIO(data)))
+        self.assertEqual([item for item, _ in items],
+                         [{'a': 'ё'}, {'b': 2}, {'c': [3]}])
+        rest = list(iter_array(io.BytesIO(data), items[0][1]))
+        self.assertEqual([item for item, _ in rest], [{'b': 2}, {'c': [3]}])
+
+
+class ExportImportTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'dump.json')
+
+        author = User.objects.create_user(username='author')
+        reader = User.objects.create_user(username='reader')
+        group = Group.objects.create(title='Группа', slug='group')
+        for i in range(5):
+            post = Post.objects.create(
+                text=f'Пост {i}', author=author, group=group)
+        Comment.objects.create(post=post, author=reader, text='Комментарий')
+        Follow.objects.create(user=reader, author=author)
+        self.pub_dates = list(
+            Post.objects.order_by('pk').values_list('pub_date', flat=True))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_round_trip(self):
+        """Выгрузка и загрузка пачками восстанавливают данные"""
+        call_command('export_data', self.path, stdout=io.StringIO())
+        for model in (Follow, Comment, Post, Group, User):
+            model.objects.all().delete()
+
+        call_command('import_data', self.path, batch_size=3,
+                     stdout=io.StringIO())
+
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(Post.objects.count(), 5)
+        self.assertEqual(
+            list(Post.objects.order_by('pk')
+                 .values_list('pub_date', flat=True)),
+            self.pub_dates)
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(
+            UserStats.objects.get(user__username='author').posts_count, 5)
+        self.assertEqual(TimelineEntry.objects.count(), 5)
+        self.assertTrue(SearchEntry.objects.filter(term='комментар').exists())
+        self.assertFalse(os.path.exists(self.path + '.progress'))
+
+    def test_resume(self):
+        """С --resume загрузка продолжается после последней пачки"""
+        call_command('export_data', self.path, stdout=io.StringIO())
+        # Пользователи и группа — первые три объекта — уже загружены.
+        for model in (Follow, Comment, Post):
+            model.objects.all().delete()
+        with open(self.path, 'rb') as stream:
+            offsets = [offset for _, offset in iter_array(stream)]
+        with open(self.path + '.progress', 'w') as progress:
+            progress.write(
+                f'{{"offset": {offsets[2]}, "count": 3, "skipped": 0}}')
+
+        call_command('import_data', self.path, resume=True,
+                     skip_rebuild=True, stdout=io.StringIO())
+
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(Post.objects.count(), 5)
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_invalid_rows_fail_loudly(self):
+        """Строка, нарушающая NOT NULL, не пропускается молча"""
+        author = User.objects.get(username='author')
+        with open(self.path, 'w') as dump:
+            json.dump([{'model': 'posts.post', 'pk': 1000, 'fields': {
+                'text': None, 'pub_date': '2020-01-01T00:00:00Z',
+                'updated': '2020-01-01T00:00:00Z', 'author': author.pk,
+                'group': None, 'image': ''}}], dump)
+
+        with self.assertRaises(IntegrityError):
+            call_command('import_data', self.path, skip_rebuild=True,
+                         stdout=io.StringIO())
+        self.assertFalse(Post.objects.filter(pk=1000).exists())
+
+
+class ShippedDumpTests(TestCase):
+    def test_import_shipped_dump(self):
+        """dump.json из репозитория загружается целиком"""
+        source = os.path.join(settings.BASE_DIR, 'dump.json')
+        with open(source) as dump:
+            expected = Counter(item['model'] for item in json.load(dump))
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = shutil.copy(source, directory)
+
+        call_command('import_data', path, stdout=io.StringIO())
+
+        for model in (User, Group, Post, Comment, Follow):
+            with self.subTest(model=model._meta.label_lower):
+                self.assertEqual(model.objects.count(),
+                                 expected[model._meta.label_lower])
+        self.assertEqual(Post.objects.count(), 46)
+        post = Post.objects.earliest('pub_date')
+        self.assertEqual(post.updated, post.pub_date)
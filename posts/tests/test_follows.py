@@ -0,0 +1,86 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import follows
+from posts.models import Follow
+from yatube.cache_backends import SQLiteCache
+
+User = get_user_model()
+
+
+class FollowSetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user(username='reader')
+        self.authors = [User.objects.create_user(username=f'author{i}')
+                        for i in range(5)]
+        for author in self.authors[::2]:
+            Follow.objects.create(user=self.reader, author=author)
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_membership(self):
+        """Множество подписок совпадает с подписками в базе"""
+        followed = follows.followed_ids(self.reader)
+        self.assertEqual(list(followed),
+                         sorted(author.pk for author in self.authors[::2]))
+        for i, author in enumerate(self.authors):
+            with self.subTest(author=author.username):
+                self.assertEqual(author.pk in followed, i % 2 == 0)
+
+    def test_set_is_cached(self):
+        """Повторная загрузка подписок не обращается к базе"""
+        follows.followed_ids(self.reader)
+        reader = User.objects.get(pk=self.reader.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(follows.is_following(reader, self.authors[0]))
+
+    def test_anonymous_follows_nobody(self):
+        """Аноним ни на кого не подписан"""
+        self.assertFalse(follows.is_following(
+            self.client_class().get(reverse('index')).wsgi_request.user,
+            self.authors[0]))
+
+    def test_views_invalidate_set(self):
+        """Подписка и отписка через сайт сразу меняют кнопку в профиле"""
+        author = self.authors[1]
+        profile = reverse('profile', args=[author.username])
+        self.assertFalse(self.client.get(profile).context['following'])
+
+        self.client.get(reverse('profile_follow', args=[author.username]))
+        self.assertTrue(self.client.get(profile).context['following'])
+
+        self.client.get(reverse('profile_unfollow', args=[author.username]))
+        self.assertFalse(self.client.get(profile).context['following'])
+
+    def test_orm_writes_invalidate_set(self):
+        """Подписки, созданные и удалённые мимо сайта, сбрасывают кэш"""
+        author = self.authors[1]
+        self.assertFalse(follows.is_following(self.reader, author))
+
+        Follow.objects.create(user=self.reader, author=author)
+        reader = User.objects.get(pk=self.reader.pk)
+        self.assertTrue(follows.is_following(reader, author))
+
+        Follow.objects.filter(user=self.reader, author=author).delete()
+        reader = User.objects.get(pk=self.reader.pk)
+        self.assertFalse(follows.is_following(reader, author))
+
+    def test_set_is_shared_and_expires(self):
+        """Кэш подписок общий для процессов и живёт ограниченное время"""
+        key = follows.FOLLOWS_KEY.format(self.reader.pk)
+        # Другой процесс: своя копия бэкенда с тем же файлом.
+        other = SQLiteCache(settings.CACHES['default']['LOCATION'], {})
+        follows.followed_ids(self.reader)
+        self.assertIsNotNone(other.get(key))
+        with other._connection() as connection:
+            expires, = connection.execute(
+                'SELECT expires FROM cache WHERE key = ?',
+                [other.make_key(key)]).fetchone()
+        self.assertIsNotNone(expires)
+
+        Follow.objects.create(user=self.reader, author=self.authors[1])
+        self.assertIsNone(other.get(key))
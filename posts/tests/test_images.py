@@ -0,0 +1,81 @@
+import io
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from posts.forms import PostForm
+from posts.models import Post
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def jpeg_upload(size=(4000, 3000), exif=None, name='photo.jpg'):
+    image = Image.new('RGB', size, (200, 100, 50))
+    output = io.BytesIO()
+    params = {'exif': exif} if exif is not None else {}
+    image.save(output, 'JPEG', **params)
+    return SimpleUploadedFile(name, output.getvalue(), 'image/jpeg')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGE_MAX_SIZE=(800, 800))
+class ImageIngestionTests(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='author')
+
+    def save_post(self, upload):
+        form = PostForm(data={'text': 'Пост с фото'},
+                        files={'image': upload})
+        self.assertTrue(form.is_valid(), form.errors)
+        post = form.save(commit=False)
+        post.author = self.user
+        post.save()
+        return post
+
+    def test_image_is_downscaled_and_reencoded(self):
+        """Картинка уменьшается и сохраняется в настроенном формате"""
+        upload = jpeg_upload()
+        post = self.save_post(upload)
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.format, settings.IMAGE_FORMAT)
+            self.assertEqual(image.size, (800, 600))
+        self.assertLess(post.image.size, upload.size)
+
+    def test_exif_is_stripped(self):
+        """Метаданные EXIF не попадают в сохранённый файл"""
+        exif = Image.Exif()
+        exif[0x010F] = 'Камера'
+        exif[0x0112] = 6
+        post = self.save_post(jpeg_upload(size=(300, 200), exif=exif))
+        with Image.open(post.image.path) as image:
+            self.assertEqual(dict(image.getexif()), {})
+            # Поворот из EXIF применён к пикселям.
+            self.assertEqual(image.size, (200, 300))
+
+    def test_identical_uploads_share_file(self):
+        """Повторная загрузка того же файла не создаёт копию"""
+        first = self.save_post(jpeg_upload(name='one.jpg'))
+        second = self.save_post(jpeg_upload(name='two.jpg'))
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(Post.objects.filter(
+            image=first.image.name).count(), 2)
+
+    @override_settings(IMAGE_MAX_PIXELS=1000)
+    def test_huge_image_is_rejected(self):
+        """Слишком большая по пикселям картинка не проходит валидацию"""
+        form = PostForm(data={'text': 'Пост'},
+                        files={'image': jpeg_upload(size=(100, 100))})
+        self.assertFalse(form.is_valid())
+        self.assertIn('image', form.errors)
@@ -0,0 +1,70 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from posts.models import Comment, Follow, Group, Post, TimelineEntry
+from posts.paginator import CursorPaginator
+
+User = get_user_model()
+
+
+def query_plan(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+class FeedIndexTests(TestCase):
+    """Ленты читаются по индексу без сортировки во временном B-дереве"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(text='Пост', author=cls.user,
+                                       group=cls.group)
+        cls.feeds = {
+            'index': (Post.objects.all(), 'pub_date'),
+            'profile': (Post.objects.filter(author=cls.user),
+                        'post_author_pub_date'),
+            'group': (Post.objects.filter(group=cls.group),
+                      'post_group_pub_date'),
+            'comments': (Comment.objects.filter(post=cls.post),
+                         'comment_post_created'),
+            'follow': (TimelineEntry.objects.filter(user=cls.user),
+                       'timeline_user_pub_date'),
+        }
+
+    def assertUsesIndex(self, queryset, index):
+        plan = query_plan(queryset)
+        self.assertFalse(any('TEMP B-TREE' in step for step in plan), plan)
+        self.assertTrue(any(index in step for step in plan), plan)
+
+    def pages(self, queryset):
+        field = 'created' if queryset.model is Comment else 'pub_date'
+        tiebreak = 'post_id' if queryset.model is TimelineEntry else 'pk'
+        paginator = CursorPaginator(queryset, 10, field=field,
+                                    tiebreak=tiebreak)
+        seek = paginator._seek((timezone.now(), self.post.pk), 'lt')
+        order = [f'-{field}', f'-{tiebreak}']
+        return {
+            'first': queryset.order_by(*order)[:11],
+            'next': queryset.filter(seek).order_by(*order)[:11],
+        }
+
+    def test_feeds_use_indexes(self):
+        """Первая и следующие страницы лент идут по составным индексам"""
+        for name, (queryset, index) in self.feeds.items():
+            for page, query in self.pages(queryset).items():
+                with self.subTest(feed=name, page=page):
+                    self.assertUsesIndex(query, index)
+
+    def test_followers_lookup_uses_index(self):
+        """Подписчики автора выбираются по покрывающему индексу"""
+        queryset = Follow.objects.filter(author=self.user).values('user')
+        plan = query_plan(queryset)
+        self.assertTrue(
+            any('COVERING INDEX follow_author_user' in step
+                for step in plan), plan)
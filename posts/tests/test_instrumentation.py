@@ -0,0 +1,96 @@
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import instrumentation
+from posts.models import Post
+from yatube.cache_backends import SQLiteCache
+
+User = get_user_model()
+
+
+class RequestStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        instrumentation.flush()
+        instrumentation.store().clear()
+        self.author = User.objects.create_user(username='author')
+        Post.objects.create(text='Пост', author=self.author)
+
+    def test_request_is_measured(self):
+        """Запрос попадает в отчёт со своими запросами к БД и размером"""
+        response = self.client.get(reverse('index'))
+        row = instrumentation.report()['index']
+        self.assertEqual(row['requests'], 1)
+        self.assertGreater(row['queries']['p50'], 0)
+        self.assertGreater(row['template_ms']['p50'], 0)
+        self.assertEqual(row['response_bytes']['p50'],
+                         len(response.content))
+
+    def test_cache_hits_are_counted(self):
+        """В отчёте видна доля попаданий в кэш страниц"""
+        self.client.get(reverse('index'))
+        self.client.get(reverse('index'))
+        row = instrumentation.report()['index']
+        self.assertEqual(row['cache_hit_rate'], 0.5)
+
+    def test_window_is_limited(self):
+        """Хранится только последнее окно замеров"""
+        for _ in range(5):
+            self.client.get(reverse('about:author'))
+        instrumentation.WINDOW, window = 3, instrumentation.WINDOW
+        try:
+            report = instrumentation.report()
+        finally:
+            instrumentation.WINDOW = window
+        self.assertEqual(report['about:author']['requests'], 3)
+
+    def test_samples_are_shared_between_processes(self):
+        """Пачки разных процессов не затирают друг друга"""
+        self.client.get(reverse('index'))
+        instrumentation.flush()
+        # Другой процесс: своя копия бэкенда кэша и свои накопленные замеры.
+        other = SQLiteCache(
+            settings.CACHES[settings.REQUEST_STATS_CACHE]['LOCATION'], {})
+        other.add(instrumentation.SEQUENCE_KEY, 0, None)
+        number = other.incr(instrumentation.SEQUENCE_KEY)
+        sample = (0,) * (len(instrumentation.FIELDS) + 1)
+        other.set(instrumentation.BATCH_KEY.format(number),
+                  {'index': [sample]}, None)
+        self.assertEqual(instrumentation.report()['index']['requests'], 2)
+
+    @override_settings(REQUEST_STATS_CACHE='local', CACHES={
+        **settings.CACHES,
+        'local': {'BACKEND': 'yatube.cache_backends.LRUCache'}})
+    def test_process_local_cache_is_rejected(self):
+        """Кэш в памяти процесса для замеров не подходит"""
+        with self.assertRaises(ImproperlyConfigured):
+            instrumentation.store()
+
+    def test_endpoint_is_staff_only(self):
+        """JSON-отчёт доступен только персоналу"""
+        url = reverse('request_stats')
+        user_client = Client()
+        user_client.force_login(self.author)
+        self.assertEqual(user_client.get(url).status_code, 302)
+
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        staff_client = Client()
+        staff_client.force_login(staff)
+        self.client.get(reverse('index'))
+        response = staff_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('index', response.json())
+
+    def test_report_command(self):
+        """Команда печатает строку на каждое имя URL"""
+        self.client.get(reverse('index'))
+        out = StringIO()
+        call_command('request_report', stdout=out)
+        self.assertIn('index', out.getvalue())
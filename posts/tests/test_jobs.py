@@ -0,0 +1,145 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import transaction
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import jobs, search, tasks
+from posts.models import Follow, Job, Post, TimelineEntry
+
+User = get_user_model()
+
+CALLS = []
+
+
+def remember(value):
+    CALLS.append(value)
+
+
+def fail(value):
+    raise RuntimeError(f'Сбой {value}')
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def add(self, task, **kwargs):
+        return Job.objects.create(task=jobs.task_name(task),
+                                  kwargs=jobs.json.dumps(kwargs))
+
+    def test_successful_job_is_removed(self):
+        """Выполненная задача вызывает функцию и удаляется из очереди"""
+        self.add(remember, value=1)
+        self.assertEqual(jobs.work('worker'), 1)
+        self.assertEqual(CALLS, [1])
+        self.assertFalse(Job.objects.exists())
+
+    def test_failed_job_is_retried_later(self):
+        """Упавшая задача возвращается в очередь с задержкой"""
+        job = self.add(fail, value=1)
+        jobs.work('worker')
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertEqual(job.attempts, 1)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('Сбой 1', job.last_error)
+        self.assertEqual(jobs.work('worker'), 0)
+
+    def test_job_fails_after_max_attempts(self):
+        """После последней попытки задача помечается как проваленная"""
+        job = self.add(fail, value=1)
+        Job.objects.filter(pk=job.pk).update(attempts=4)
+        jobs.work('worker')
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+
+    def test_job_is_claimed_once(self):
+        """Задачу, взятую одним воркером, не получает другой"""
+        self.add(remember, value=1)
+        claimed = Job.objects.claim('first', 10, timeout=60)
+        self.assertEqual(len(claimed), 1)
+        self.assertEqual(Job.objects.claim('second', 10, timeout=60), [])
+
+    def test_abandoned_job_is_reclaimed(self):
+        """Задача умершего воркера после таймаута достаётся другому"""
+        job = self.add(remember, value=1)
+        Job.objects.claim('dead', 10, timeout=60)
+        Job.objects.filter(pk=job.pk).update(
+            locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(jobs.work('alive'), 1)
+        self.assertEqual(CALLS, [1])
+
+    def test_abandoned_last_attempt_fails(self):
+        """Зависшая последняя попытка не перезапускается, а проваливается"""
+        job = self.add(remember, value=1)
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.RUNNING, attempts=5, locked_by='dead',
+            locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(jobs.work('alive'), 0)
+        self.assertEqual(CALLS, [])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertTrue(job.last_error)
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_mode(self):
+        """В режиме JOBS_EAGER задача выполняется сразу"""
+        jobs.enqueue(remember, value=2)
+        self.assertEqual(CALLS, [2])
+        self.assertFalse(Job.objects.exists())
+
+    def test_run_jobs_once(self):
+        """run_jobs --once выполняет всю очередь и завершается"""
+        for value in range(15):
+            self.add(remember, value=value)
+        out = StringIO()
+        call_command('run_jobs', once=True, stdout=out)
+        self.assertEqual(sorted(CALLS), list(range(15)))
+        self.assertIn('15', out.getvalue())
+
+
+class EnqueueTests(TransactionTestCase):
+    def test_enqueue_after_commit(self):
+        """Задача попадает в очередь только после коммита"""
+        with transaction.atomic():
+            jobs.enqueue(remember, value=1)
+            self.assertFalse(Job.objects.exists())
+        job = Job.objects.get()
+        self.assertEqual(job.task, 'posts.tests.test_jobs.remember')
+
+    def test_unique_job_is_not_duplicated(self):
+        """Одинаковая задача с unique не дублируется, пока ждёт запуска"""
+        jobs.enqueue(remember, unique=True, value=1)
+        jobs.enqueue(remember, unique=True, value=1)
+        jobs.enqueue(remember, unique=True, value=2)
+        self.assertEqual(Job.objects.count(), 2)
+
+
+class SideEffectJobsTests(TransactionTestCase):
+    def test_write_views_enqueue_side_effects(self):
+        """Ленты и поиск обновляются задачами, а не в запросе"""
+        author = User.objects.create_user(username='author')
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=author)
+        jobs.work('worker')
+        client = Client()
+        client.force_login(author)
+
+        client.post(reverse('new_post'), {'text': 'Фоновая запись'})
+        post = Post.objects.get()
+        self.assertEqual(
+            set(Job.objects.values_list('task', flat=True)),
+            {jobs.task_name(tasks.fan_out), jobs.task_name(tasks.index_post)})
+        self.assertFalse(TimelineEntry.objects.exists())
+
+        jobs.work('worker')
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=reader, post=post).exists())
+        self.assertEqual(search.search('фоновая').get()['post'], post.pk)
+        self.assertFalse(Job.objects.exists())
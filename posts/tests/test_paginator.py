@@ -0,0 +1,62 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Post
+from posts.paginator import CursorPaginator
+
+User = get_user_model()
+
+
+class CursorPaginatorTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='test_user')
+        Post.objects.bulk_create([
+            Post(text=f'Пост {i}', author=self.user) for i in range(25)
+        ])
+        self.paginator = CursorPaginator(Post.objects.all(), 10)
+
+    def test_pages_follow_each_other(self):
+        """Курсоры обходят ленту без пропусков и повторов"""
+        seen = []
+        page = self.paginator.get_page()
+        self.assertFalse(page.has_previous())
+        while True:
+            seen.extend(post.pk for post in page)
+            if not page.has_next():
+                break
+            page = self.paginator.get_page(after=page.next_cursor())
+
+        expected = list(
+            Post.objects.order_by('-pub_date', '-pk')
+            .values_list('pk', flat=True)
+        )
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(page), 5)
+
+    def test_previous_page(self):
+        """Ссылка «назад» возвращает на предыдущую страницу"""
+        first = self.paginator.get_page()
+        second = self.paginator.get_page(after=first.next_cursor())
+        back = self.paginator.get_page(before=second.previous_cursor())
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+        self.assertTrue(back.has_next())
+
+    def test_invalid_cursor_returns_first_page(self):
+        """Испорченный курсор отдаёт первую страницу"""
+        page = self.paginator.get_page(after='не-курсор')
+        self.assertEqual(list(page), list(self.paginator.get_page()))
+
+    def test_index_skips_count_query(self):
+        """Курсорная страница главной не выполняет COUNT(*)"""
+        first = self.client.get(reverse('index')).context['page']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('index'), {'after': first.next_cursor()}
+            )
+        self.assertEqual(len(response.context['page']), 10)
+        for query in queries.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'].upper())
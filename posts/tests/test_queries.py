@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class FeedQueryBudgetTests(TestCase):
+    def setUp(self):
+        self.group = Group.objects.create(title='Группа', slug='group')
+        self.reader = User.objects.create_user(username='reader')
+        self.client = Client()
+        self.client.force_login(self.reader)
+        self.feed_urls = [
+            reverse('index'),
+            reverse('group', args=['group']),
+            reverse('profile', args=['author_0']),
+            reverse('follow_index'),
+        ]
+
+    def create_posts(self, count):
+        for i in range(count):
+            author, _ = User.objects.get_or_create(username=f'author_{i % 3}')
+            Follow.objects.get_or_create(user=self.reader, author=author)
+            post = Post.objects.create(
+                text='Текст', author=author, group=self.group)
+            Comment.objects.create(
+                post=post, author=self.reader, text='Комментарий')
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_feed_queries_do_not_grow_with_page_size(self):
+        """Число запросов ленты не зависит от числа постов на странице"""
+        self.create_posts(1)
+        budget = {url: self.count_queries(url) for url in self.feed_urls}
+
+        self.create_posts(10)
+        for url in self.feed_urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url), budget[url])
@@ -0,0 +1,92 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import rendering
+from posts.forms import CommentForm, PostForm
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+class RenderedTextTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='author')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_forms_store_html(self):
+        """Формы сохраняют экранированный HTML текста с переносами"""
+        form = PostForm(data={'text': 'Строка <b>1</b>\nСтрока 2'})
+        self.assertTrue(form.is_valid())
+        post = form.save(commit=False)
+        post.author = self.user
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.text_html,
+                         'Строка &lt;b&gt;1&lt;/b&gt;<br>Строка 2')
+        self.assertEqual(post.text_html_version, rendering.VERSION)
+
+        form = CommentForm(data={'text': 'А\nБ'})
+        self.assertTrue(form.is_valid())
+        comment = form.save(commit=False)
+        comment.author, comment.post = self.user, post
+        comment.save()
+        self.assertEqual(comment.text_html, 'А<br>Б')
+
+    def test_edit_rerenders(self):
+        """Правка поста пересчитывает HTML"""
+        post = Post.objects.create(text='Старый', author=self.user)
+        self.client.post(reverse('post_edit', args=['author', post.id]),
+                         {'text': 'Новый\nтекст'})
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, 'Новый<br>текст')
+
+    def test_orm_and_admin_saves_render(self):
+        """HTML пересчитывается и при сохранении в обход форм сайта"""
+        post = Post.objects.create(text='Из\nкода', author=self.user)
+        self.assertEqual(post.text_html, 'Из<br>кода')
+        comment = Comment.objects.create(post=post, author=self.user,
+                                         text='<b>Тоже</b>')
+        self.assertEqual(comment.text_html, '&lt;b&gt;Тоже&lt;/b&gt;')
+
+        self.user.is_staff = self.user.is_superuser = True
+        self.user.save()
+        self.client.post(
+            reverse('admin:posts_post_change', args=[post.id]),
+            {'text': 'Из\nадминки', 'author': self.user.id,
+             'comments_count': 1})
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, 'Из<br>админки')
+
+    def test_templates_use_stored_html(self):
+        """Шаблоны выводят сохранённый HTML, не пересчитывая текст"""
+        post = Post.objects.create(text='Текст', author=self.user)
+        Post.objects.filter(pk=post.pk).update(
+            text_html='<i>сохранённый</i>')
+        comment = Comment.objects.create(
+            post=post, author=self.user, text='Комментарий')
+        Comment.objects.filter(pk=comment.pk).update(
+            text_html='<i>готовый</i>')
+        response = self.client.get(reverse('post', args=['author', post.id]))
+        self.assertContains(response, '<i>сохранённый</i>')
+        self.assertContains(response, '<i>готовый</i>')
+
+    def test_stale_rows_fall_back_and_rerender(self):
+        """Устаревший HTML рендерится на лету и пересчитывается командой"""
+        post = Post.objects.create(text='Раз\nдва', author=self.user)
+        Comment.objects.create(post=post, author=self.user, text='Три')
+        # Так выглядят записи, сохранённые до смены VERSION.
+        Post.objects.update(text_html='', text_html_version=0)
+        Comment.objects.update(text_html='', text_html_version=0)
+        response = self.client.get(reverse('post', args=['author', post.id]))
+        self.assertContains(response, 'Раз<br>два')
+
+        call_command('rerender_text', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, 'Раз<br>два')
+        self.assertFalse(Comment.objects.exclude(
+            text_html_version=rendering.VERSION).exists())
@@ -0,0 +1,73 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Post, SearchEntry
+from posts.search import stem
+
+User = get_user_model()
+
+
+class StemmerTests(TestCase):
+    def test_word_forms_share_stem(self):
+        """Формы одного слова сводятся к общей основе"""
+        forms = {
+            'котик': ['котики', 'котиков', 'котиком'],
+            'красив': ['красивая', 'красивые', 'красивого'],
+            'прогулк': ['прогулка', 'прогулки', 'прогулкой'],
+        }
+        for base, words in forms.items():
+            for word in words:
+                with self.subTest(word=word):
+                    self.assertEqual(stem(word), base)
+
+
+# Ленты и поисковый индекс обновляются фоновыми задачами.
+@override_settings(JOBS_EAGER=True)
+class SearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='test_user')
+        self.cats = Post.objects.create(
+            text='Мои котики гуляют по крыше', author=self.user)
+        self.dogs = Post.objects.create(
+            text='Собака гуляла в парке, а котик смотрел', author=self.user)
+        self.other = Post.objects.create(
+            text='Рецепт пирога', author=self.user)
+
+    def search(self, query):
+        response = self.client.get(reverse('search'), {'q': query})
+        return [post.pk for post in response.context['page']]
+
+    def test_finds_word_forms_and_ranks(self):
+        """Поиск учитывает формы слов и ставит выше более релевантные"""
+        Comment.objects.create(
+            post=self.cats, author=self.user, text='Какой котик!')
+        self.assertEqual(self.search('котиков'), [self.cats.pk, self.dogs.pk])
+
+    def test_all_words_must_match(self):
+        """В выдачу попадают посты, где есть все слова запроса"""
+        self.assertEqual(self.search('котик парк'), [self.dogs.pk])
+
+    def test_comments_are_searchable(self):
+        """Слова из комментариев находят пост"""
+        comment = Comment.objects.create(
+            post=self.other, author=self.user, text='Вкусная начинка')
+        self.assertEqual(self.search('начинки'), [self.other.pk])
+        comment.delete()
+        self.assertEqual(self.search('начинки'), [])
+
+    def test_index_follows_edits(self):
+        """После правки поста индекс обновляется"""
+        self.other.text = 'Рецепт торта'
+        self.other.save()
+        self.assertEqual(self.search('пирог'), [])
+        self.assertEqual(self.search('торт'), [self.other.pk])
+
+    def test_rebuild_command(self):
+        """Команда rebuild_search_index восстанавливает индекс"""
+        SearchEntry.objects.all().delete()
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.search('крыша'), [self.cats.pk])
@@ -0,0 +1,25 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+
+class PurgeSessionsTests(TestCase):
+    def test_deletes_only_expired_sessions_in_chunks(self):
+        """Команда удаляет просроченные сессии пачками"""
+        now = timezone.now()
+        Session.objects.bulk_create([
+            Session(session_key=f'expired{i}', session_data='',
+                    expire_date=now - timedelta(days=1, minutes=i))
+            for i in range(5)])
+        Session.objects.create(session_key='active', session_data='',
+                               expire_date=now + timedelta(days=1))
+
+        out = StringIO()
+        call_command('purge_sessions', chunk_size=2, pause=0, stdout=out)
+        self.assertEqual(list(Session.objects.values_list(
+            'session_key', flat=True)), ['active'])
+        self.assertIn('Удалено сессий: 5', out.getvalue())
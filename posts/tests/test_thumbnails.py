@@ -0,0 +1,77 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts import thumbnails
+from posts.models import Job, Post
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        small_gif = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
+        self.user = User.objects.create_user(username='test_user')
+        self.post = Post.objects.create(
+            text='Пост с картинкой',
+            author=self.user,
+            image=SimpleUploadedFile('small.gif', small_gif, 'image/gif'),
+        )
+
+    def test_placeholder_until_thumbnail_is_ready(self):
+        """Пока миниатюры нет, лента показывает заглушку"""
+        self.assertIsNone(thumbnails.get_ready(self.post.image, 'feed'))
+        response = self.client.get(reverse('index'))
+        self.assertNotContains(response, '<img class="card-img"')
+        self.assertContains(response, 'Миниатюра ещё готовится')
+
+    def test_generated_thumbnail_is_rendered(self):
+        """Созданная заранее миниатюра выводится в ленте"""
+        thumbnails.generate(self.post.image.name)
+        thumbnail = thumbnails.get_ready(self.post.image, 'feed')
+        self.assertIsNotNone(thumbnail)
+        response = self.client.get(reverse('index'))
+        self.assertContains(response, thumbnail.url)
+
+    @override_settings(JOBS_EAGER=True)
+    def test_rendering_does_not_schedule(self):
+        """Рендеринг ленты не создаёт миниатюры и не ставит задачи"""
+        self.client.get(reverse('index'))
+        self.assertIsNone(thumbnails.get_ready(self.post.image, 'feed'))
+        self.assertFalse(Job.objects.exists())
+
+    def test_generate_thumbnails_command(self):
+        """generate_thumbnails создаёт только недостающие миниатюры"""
+        out = StringIO()
+        call_command('generate_thumbnails', now=True, stdout=out)
+        self.assertIn('создано 1', out.getvalue())
+        self.assertTrue(thumbnails.is_complete(self.post.image))
+
+        out = StringIO()
+        call_command('generate_thumbnails', stdout=out)
+        self.assertIn('поставлено в очередь 0', out.getvalue())
@@ -0,0 +1,54 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+# Ленты и поисковый индекс обновляются фоновыми задачами.
+@override_settings(JOBS_EAGER=True)
+class TimelineTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def follow_page(self, **params):
+        response = self.reader_client.get(reverse('follow_index'), params)
+        return response.context['page']
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост раскладывается в ленты подписчиков"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.author_client.post(reverse('new_post'), {'text': 'Новый пост'})
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post__text='Новый пост').exists())
+        self.assertEqual(self.follow_page()[0].text, 'Новый пост')
+
+    @override_settings(TIMELINE_BACKFILL_SIZE=12)
+    def test_follow_backfills_recent_posts(self):
+        """При подписке в ленту попадают последние посты автора"""
+        for i in range(15):
+            Post.objects.create(text=f'Пост {i}', author=self.author)
+        self.reader_client.get(reverse('profile_follow', args=['author']))
+
+        first = self.follow_page()
+        self.assertEqual(first[0].text, 'Пост 14')
+        second = self.follow_page(after=first.next_cursor())
+        self.assertEqual([post.text for post in second],
+                         ['Пост 4', 'Пост 3'])
+        self.assertFalse(second.has_next())
+
+    def test_unfollow_prunes_timeline(self):
+        """После отписки посты автора пропадают из ленты"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Post.objects.create(text='Пост', author=self.author)
+        self.reader_client.get(reverse('profile_unfollow', args=['author']))
+        self.assertFalse(TimelineEntry.objects.filter(
+            user=self.reader).exists())
+        self.assertEqual(len(self.follow_page()), 0)
@@ -3,7 +3,7 @@ from datetime import datetime
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
 from posts.models import Follow, Group, Post
@@ -13,6 +13,7 @@ User = get_user_model()
 
 class PostPagesTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.user = User.objects.create_user(username='test_user')
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
@@ -272,6 +273,8 @@ class PostPagesTests(TestCase):
         error = 'Авторизованному пользователю не удалось отписаться от автора'
         self.assertFalse(is_follow, error)
 
+    # Ленты подписок обновляются фоновой задачей.
+    @override_settings(JOBS_EAGER=True)
     def test_new_post_follow_author(self):
         """Новый пост test_user появился у
         подписанного пользователя в Избранном"""
@@ -310,11 +313,12 @@ class PostPagesTests(TestCase):
     def test_cache(self):
         """Проверка кэширования постов на главной"""
         response_1 = self.client.get(reverse('index'))
-        Post.objects.create(
+        # bulk_create не шлёт сигналов, поэтому версии кэша не меняются.
+        Post.objects.bulk_create([Post(
             text='Проверка кэша',
             author=self.user,
             image=self.uploaded,
-        )
+        )])
         response_2 = self.client.get(reverse('index'))
         error = 'Новый пост сразу появился'
         self.assertHTMLEqual(
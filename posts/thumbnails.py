@@ -0,0 +1,68 @@
+"""Фоновая генерация миниатюр картинок постов.
+
+Размеры описаны в ``settings.THUMBNAIL_SIZES``. Миниатюры создаются
+фоновой задачей из очереди ``posts.jobs``, а шаблоны берут только уже
+готовые миниатюры и до их появления показывают заглушку.
+"""
+from django.conf import settings
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from . import cache, jobs
+from .models import Post
+
+
+class ReadyThumbnailBackend(ThumbnailBackend):
+    def get_ready_thumbnail(self, file_, geometry_string, **options):
+        """Возвращает миниатюру, только если она уже создана."""
+        source = ImageFile(file_)
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return default.kvstore.get(ImageFile(name, default.storage))
+
+
+backend = ReadyThumbnailBackend()
+
+
+def get_ready(image, size):
+    geometry, options = settings.THUMBNAIL_SIZES[size]
+    return backend.get_ready_thumbnail(image, geometry, **options)
+
+
+def is_complete(image):
+    """Есть ли у картинки все настроенные миниатюры."""
+    return all(get_ready(image, size) is not None
+               for size in settings.THUMBNAIL_SIZES)
+
+
+def generate(name):
+    """Создаёт все настроенные миниатюры картинки ``name``."""
+    for geometry, options in settings.THUMBNAIL_SIZES.values():
+        backend.get_thumbnail(name, geometry, **options)
+
+
+def generate_for_post(name, post_id):
+    generate(name)
+    # Страницы с заглушкой могли попасть в кэш — сбрасываем их.
+    post = Post.objects.feed().filter(pk=post_id).first()
+    if post is not None:
+        cache.bump_post(post)
+
+
+def schedule(image):
+    """Ставит генерацию миниатюр в очередь после коммита транзакции."""
+    if not image:
+        return
+    jobs.enqueue(generate_for_post, unique=True,
+                 name=image.name, post_id=image.instance.pk)
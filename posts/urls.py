@@ -8,6 +8,8 @@ urlpatterns = [
     path('new/', views.new_post, name='new_post'),
     path('about/', include('about.urls', namespace='about')),
     path('follow/', views.follow_index, name='follow_index'),
+    path('search/', views.search_posts, name='search'),
+    path('stats/requests/', views.request_stats, name='request_stats'),
     path(
         '<str:username>/follow/',
         views.profile_follow,
@@ -23,6 +25,10 @@ urlpatterns = [
         views.post_edit,
         name='post_edit'
     ),
+    path(
+        '<str:username>/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'),
     path(
         '<username>/<int:post_id>/comment/',
         views.add_comment,
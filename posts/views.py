@@ -1,34 +1,66 @@
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
+from . import cache, follows, instrumentation, search, thumbnails
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post
+from .models import Follow, Group, Post, TimelineEntry, UserStats
+from .paginator import (COMMENTS_PER_PAGE, POSTS_PER_PAGE, CursorPaginator,
+                        paginate)
 
 
 User = get_user_model()
 
 
+def entries_to_posts(entries):
+    return [entry.post for entry in entries]
+
+
+def comments_page(request, post):
+    comments = post.comments.select_related('author')
+    paginator = CursorPaginator(comments, COMMENTS_PER_PAGE, field='created')
+    return paginator.get_page(after=request.GET.get('after'))
+
+
+def index_scopes():
+    return [cache.index_scope()]
+
+
+def group_scopes(slug):
+    return [cache.group_scope(slug)]
+
+
+def profile_scopes(username):
+    return [cache.author_scope(username)]
+
+
+def post_scopes(username, post_id):
+    return [cache.post_scope(post_id), cache.author_scope(username)]
+
+
+@cache.conditional_view(lambda: Post.objects.all(), index_scopes)
+@cache.cached_view(index_scopes)
 def index(request):
-    post_list = Post.objects.select_related('group').all()
+    post_list = Post.objects.feed()
 
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    paginator, page = paginate(request, post_list)
 
     context = {'page': page,
                'paginator': paginator}
     return render(request, 'posts/index.html', context)
 
 
+@cache.conditional_view(
+    lambda slug: Post.objects.filter(group__slug=slug), group_scopes)
+@cache.cached_view(group_scopes)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.groups.all()
+    posts = group.groups.feed()
 
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    paginator, page = paginate(request, posts)
 
     context = {'group': group,
                'page': page,
@@ -36,6 +68,21 @@ def group_posts(request, slug):
     return render(request, 'posts/group.html', context)
 
 
+def search_posts(request):
+    query = request.GET.get('q', '').strip()
+    paginator = Paginator(search.search(query), POSTS_PER_PAGE)
+    page = paginator.get_page(request.GET.get('page'))
+
+    posts = Post.objects.feed().in_bulk(row['post'] for row in page)
+    page.object_list = [posts[row['post']] for row in page
+                        if row['post'] in posts]
+
+    context = {'query': query,
+               'page': page,
+               'paginator': paginator}
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def new_post(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
@@ -43,63 +90,79 @@ def new_post(request):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        thumbnails.schedule(post.image)
         return redirect('index')
 
     return render(request, 'posts/new_post.html', {'form': form})
 
 
+@cache.conditional_view(
+    lambda username: Post.objects.filter(author__username=username),
+    profile_scopes)
+@cache.cached_view(profile_scopes)
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    post_list = author.posts.feed()
 
-    posts_count = post_list.count()
+    paginator, page = paginate(request, post_list)
 
-    follows = Follow.objects.all()
-    followers_count = author.follower.count()
-    following_count = author.following.count()
+    stats = UserStats.objects.for_user(author)
 
-    following = (request.user.is_authenticated and
-                 follows.filter(user=request.user, author=author).exists())
+    following = follows.is_following(request.user, author)
 
     context = {'page': page,
                'author': author,
                'paginator': paginator,
-               'posts_count': posts_count,
-               'followers_count': followers_count,
-               'following_count': following_count,
+               'posts_count': stats.posts_count,
+               'followers_count': stats.followers_count,
+               'following_count': stats.following_count,
                'following': following}
     return render(request, 'posts/profile.html', context)
 
 
+@cache.conditional_view(
+    lambda username, post_id: Post.objects.filter(pk=post_id), post_scopes)
+@cache.cached_view(post_scopes)
 def post_view(request, username, post_id):
-    post = get_object_or_404(Post, pk=post_id, author__username=username)
+    post = get_object_or_404(Post.objects.feed(),
+                             pk=post_id, author__username=username)
     author = post.author
-    posts_count = author.posts.all().count()
-    comments = post.comments.all()
+    stats = UserStats.objects.for_user(author)
+    comments = comments_page(request, post)
     form = CommentForm()
 
-    follows = Follow.objects.all()
-    followers_count = author.follower.count()
-    following_count = author.following.count()
-
-    following = (request.user.is_authenticated and
-                 follows.filter(user=request.user, author=author).exists())
+    following = follows.is_following(request.user, author)
 
     context = {'post': post,
+               'posts': [post],
                'author': author,
-               'posts_count': posts_count,
+               'posts_count': stats.posts_count,
                'comments': comments,
                'form': form,
-               'followers_count': followers_count,
-               'following_count': following_count,
+               'followers_count': stats.followers_count,
+               'following_count': stats.following_count,
                'following': following}
     return render(request, 'posts/post.html', context)
 
 
+@cache.cached_view(lambda username, post_id: [cache.post_scope(post_id)])
+def post_comments(request, username, post_id):
+    post = get_object_or_404(Post.objects.feed(),
+                             pk=post_id, author__username=username)
+    comments = comments_page(request, post)
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'comments': [{'id': comment.id,
+                          'author': comment.author.username,
+                          'text': comment.text,
+                          'created': comment.created}
+                         for comment in comments],
+            'next': comments.next_cursor(),
+        }, json_dumps_params={'ensure_ascii': False})
+    context = {'post': post, 'author': post.author, 'comments': comments}
+    return render(request, 'includes/comment_list.html', context)
+
+
 @login_required
 def post_edit(request, username, post_id):
     post = get_object_or_404(Post, pk=post_id, author__username=username)
@@ -110,7 +173,8 @@ def post_edit(request, username, post_id):
     form = PostForm(
         request.POST or None, files=request.FILES or None, instance=post)
     if form.is_valid():
-        post.save()
+        post = form.save()
+        thumbnails.schedule(post.image)
         return redirect('post', username=username, post_id=post_id)
 
     context = {'form': form,
@@ -147,11 +211,11 @@ def add_comment(request, username, post_id):
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
+    entries = TimelineEntry.objects.filter(
+        user=request.user).select_related('post__author', 'post__group')
 
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    paginator, page = paginate(request, entries, tiebreak='post_id',
+                               transform=entries_to_posts)
 
     context = {'page': page,
                'paginator': paginator}
@@ -173,3 +237,9 @@ def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('profile', username=username)
+
+
+@staff_member_required
+def request_stats(request):
+    return JsonResponse(instrumentation.report(),
+                        json_dumps_params={'ensure_ascii': False})
@@ -0,0 +1,297 @@
+"""Локальные бэкенды кэша, не требующие отдельного сервера.
+
+``SQLiteCache`` хранит данные в файле SQLite и общий для всех воркеров
+на одной машине. ``LRUCache`` живёт в памяти процесса и ограничен
+суммарным размером значений в байтах, а не числом ключей.
+
+Версии страниц, подписки, сессии и замеры запросов должны быть видны всем
+процессам, поэтому берут кэш через ``shared``.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+
+_lru_stores = {}
+
+
+class LRUCache(BaseCache):
+    """Кэш в памяти процесса с вытеснением давно не читанных значений.
+
+    Предел задаётся ``OPTIONS['MAX_BYTES']`` (по умолчанию 64 МБ) и
+    считается по размеру сериализованных значений.
+    """
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, name, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._max_bytes = int(options.get('MAX_BYTES', 64 * 1024 * 1024))
+        store = _lru_stores.setdefault(name, {
+            'data': OrderedDict(),
+            'lock': threading.Lock(),
+            'size': [0],
+        })
+        self._data = store['data']
+        self._lock = store['lock']
+        self._size = store['size']
+
+    def _expired(self, key):
+        _, expires = self._data[key]
+        return expires is not None and expires <= time.time()
+
+    def _lookup(self, key):
+        if key not in self._data:
+            return None
+        if self._expired(key):
+            self._delete(key)
+            return None
+        self._data.move_to_end(key)
+        return self._data[key][0]
+
+    def _delete(self, key):
+        pickled, _ = self._data.pop(key)
+        self._size[0] -= len(pickled)
+
+    def _set(self, key, value, expires):
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        if key in self._data:
+            self._delete(key)
+        if len(pickled) > self._max_bytes:
+            return
+        while self._data and self._size[0] + len(pickled) > self._max_bytes:
+            self._delete(next(iter(self._data)))
+        self._data[key] = (pickled, expires)
+        self._size[0] += len(pickled)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        with self._lock:
+            if self._lookup(key) is not None:
+                return False
+            self._set(key, value, self.get_backend_timeout(timeout))
+            return True
+
+    def get(self, key, default=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        with self._lock:
+            pickled = self._lookup(key)
+        if pickled is None:
+            return default
+        return pickle.loads(pickled)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        with self._lock:
+            self._set(key, value, self.get_backend_timeout(timeout))
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        with self._lock:
+            pickled = self._lookup(key)
+            if pickled is None:
+                return False
+            self._data[key] = (pickled, self.get_backend_timeout(timeout))
+            return True
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        with self._lock:
+            pickled = self._lookup(key)
+            if pickled is None:
+                raise ValueError("Key '%s' not found" % key)
+            _, expires = self._data[key]
+            new_value = pickle.loads(pickled) + delta
+            self._set(key, new_value, expires)
+        return new_value
+
+    def has_key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        with self._lock:
+            return self._lookup(key) is not None
+
+    def delete(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        with self._lock:
+            if key in self._data:
+                self._delete(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._size[0] = 0
+
+
+class SQLiteCache(BaseCache):
+    """Кэш в файле SQLite, общий для процессов на одной машине.
+
+    ``LOCATION`` — путь к файлу базы. Каждый поток и процесс открывает
+    своё соединение; журнал WAL позволяет читать параллельно с записью.
+    """
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+    cull_every = 100
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+        directory = os.path.dirname(self._path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self._path, timeout=5,
+                                     isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS cache ('
+            'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)')
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        self._local.writes = 0
+        return connection
+
+    def _expires(self, timeout):
+        return self.get_backend_timeout(timeout)
+
+    def _live(self, sql):
+        return sql + ' AND (expires IS NULL OR expires > ?)'
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute(
+                'DELETE FROM cache WHERE key = ? AND expires <= ?',
+                (key, time.time()))
+            inserted = connection.execute(
+                'INSERT OR IGNORE INTO cache VALUES (?, ?, ?)',
+                (key, pickled, self._expires(timeout))).rowcount
+        self._maybe_cull()
+        return bool(inserted)
+
+    def get(self, key, default=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        row = self._connection().execute(
+            self._live('SELECT value FROM cache WHERE key = ?'),
+            (key, time.time())).fetchone()
+        if row is None:
+            return default
+        return pickle.loads(row[0])
+
+    def get_many(self, keys, version=None):
+        if not keys:
+            return {}
+        made = {self.make_key(key, version=version): key for key in keys}
+        for key in made:
+            self.validate_key(key)
+        placeholders = ', '.join('?' * len(made))
+        rows = self._connection().execute(
+            self._live(f'SELECT key, value FROM cache '
+                       f'WHERE key IN ({placeholders})'),
+            (*made, time.time()))
+        return {made[key]: pickle.loads(value) for key, value in rows}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        self._connection().execute(
+            'INSERT OR REPLACE INTO cache VALUES (?, ?, ?)',
+            (key, pickled, self._expires(timeout)))
+        self._maybe_cull()
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        updated = self._connection().execute(
+            self._live('UPDATE cache SET expires = ? WHERE key = ?'),
+            (self._expires(timeout), key, time.time())).rowcount
+        return bool(updated)
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            row = connection.execute(
+                self._live('SELECT value FROM cache WHERE key = ?'),
+                (key, time.time())).fetchone()
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            new_value = pickle.loads(row[0]) + delta
+            connection.execute(
+                'UPDATE cache SET value = ? WHERE key = ?',
+                (pickle.dumps(new_value, self.pickle_protocol), key))
+        return new_value
+
+    def has_key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        row = self._connection().execute(
+            self._live('SELECT 1 FROM cache WHERE key = ?'),
+            (key, time.time())).fetchone()
+        return row is not None
+
+    def delete(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        self._connection().execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache')
+
+    def _maybe_cull(self):
+        self._local.writes += 1
+        if self._local.writes % self.cull_every:
+            return
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute(
+                'DELETE FROM cache WHERE expires <= ?', (time.time(),))
+            count, = connection.execute(
+                'SELECT COUNT(*) FROM cache').fetchone()
+            if count <= self._max_entries:
+                return
+            excess = (count // self._cull_frequency
+                      if self._cull_frequency else count)
+            connection.execute(
+                'DELETE FROM cache WHERE key IN ('
+                'SELECT key FROM cache '
+                'ORDER BY expires IS NULL, expires LIMIT ?)', (excess,))
+
+
+# В этих кэшах запись одного процесса не видна другим.
+PROCESS_LOCAL_CACHES = (LocMemCache, LRUCache)
+
+
+def shared(alias, purpose):
+    """Кэш ``alias``, если он общий для процессов, иначе ошибка настройки."""
+    backend = caches[alias]
+    if isinstance(backend, PROCESS_LOCAL_CACHES):
+        raise ImproperlyConfigured(
+            f'Кэш {alias!r} ({purpose}) виден только своему процессу; '
+            'нужен общий бэкенд, например sqlite или file.')
+    return backend
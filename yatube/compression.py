@@ -0,0 +1,117 @@
+"""Сжатие ответов gzip и brotli.
+
+Страницы из кэша представлений (``posts.cache.cached_view``) помечены
+ключом ``compression_key``: их сжатая копия кладётся в кэш рядом со
+страницей и на следующих попаданиях отдаётся готовой, без повторного
+сжатия. Такие копии сжимаются сильнее — это делается один раз на версию
+страницы. Остальные ответы (страницы авторизованных пользователей с
+CSRF-токеном, JSON API) сжимаются на лету быстрым уровнем.
+"""
+import gzip
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+# Ответы меньше MIN_SIZE байт почти не сжимаются.
+MIN_SIZE = 200
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript',
+                      'application/xml', 'image/svg+xml')
+COMPRESSED_KEY = 'compressed:{}:{}'
+
+# Кодировка -> уровень для кэшируемых ответов и для ответов на лету.
+LEVELS = {
+    'br': {'cached': 9, 'dynamic': 4},
+    'gzip': {'cached': 9, 'dynamic': 6},
+}
+
+
+def available_encodings():
+    """Поддерживаемые кодировки, предпочтительные — в начале."""
+    if brotli is not None:
+        return ['br', 'gzip']
+    return ['gzip']
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding с ненулевым q."""
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding.lower())
+    return accepted
+
+
+def negotiate(request, encodings):
+    """Первая из ``encodings``, которую принимает клиент, или None."""
+    accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    for encoding in encodings:
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+def compress(data, encoding, level):
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def compressed_content(response, encoding):
+    """Сжатое тело ответа, из кэша, если страница кэшируемая."""
+    key = getattr(response, 'compression_key', None)
+    if key is None:
+        return compress(response.content, encoding,
+                        LEVELS[encoding]['dynamic'])
+    key = COMPRESSED_KEY.format(encoding, key)
+    content = cache.get(key)
+    if content is None:
+        content = compress(response.content, encoding,
+                           LEVELS[encoding]['cached'])
+        cache.set(key, content, settings.VIEW_CACHE_TIMEOUT)
+    return content
+
+
+class CompressionMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (response.streaming or response.status_code != 200
+                or response.has_header('Content-Encoding')
+                or len(response.content) < MIN_SIZE
+                or not response.get('Content-Type', '').startswith(
+                    COMPRESSIBLE_TYPES)):
+            return response
+
+        patch_vary_headers(response, ['Accept-Encoding'])
+        encoding = negotiate(request, available_encodings())
+        if encoding is None:
+            return response
+        content = compressed_content(response, encoding)
+        if len(content) >= len(response.content):
+            return response
+
+        response.content = content
+        response['Content-Length'] = str(len(content))
+        response['Content-Encoding'] = encoding
+        # Сжатое тело отличается побайтно, но не по смыслу (RFC 7232).
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
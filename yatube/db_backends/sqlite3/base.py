@@ -0,0 +1,38 @@
+"""SQLite с настройками для нескольких одновременных писателей.
+
+При каждом подключении включается журнал WAL (читатели не блокируют
+писателя), ожидание занятой базы вместо немедленной ошибки «database is
+locked», ``synchronous=NORMAL`` и кэш страниц побольше. Прагмы можно
+переопределить в ``OPTIONS['PRAGMAS']``.
+
+Транзакции ``atomic`` начинаются с ``BEGIN IMMEDIATE``: блокировка на
+запись берётся сразу, и ожидание по ``busy_timeout`` работает. С обычным
+``BEGIN`` транзакция, которая сначала читает, а потом пишет, получает
+SQLITE_BUSY без ожидания, если другой писатель успел закоммитить.
+"""
+from django.db.backends.sqlite3 import base
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -20000,
+    'temp_store': 'MEMORY',
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = {**PRAGMAS, **params.pop('PRAGMAS', {})}
+        self.transaction_mode = params.pop('transaction_mode', 'IMMEDIATE')
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
@@ -0,0 +1,71 @@
+"""Сессии в кэше с отложенной записью в базу.
+
+Как ``django.contrib.sessions.backends.cached_db``, сессия читается из
+кэша и только при промахе — из таблицы ``django_session``. Запись в базу
+отложена: изменения, не меняющие вошедшего пользователя, пишутся только
+в кэш, а в базу — не чаще раза в ``settings.SESSION_WRITE_BEHIND`` секунд.
+Создание сессии, вход и выход сохраняются в базу сразу, поэтому воркер,
+у которого сессии нет в кэше, всё равно увидит пользователя.
+
+Кэш ``SESSION_CACHE_ALIAS`` обязан быть общим для всех процессов (sqlite,
+file): с кэшем процесса (lru, locmem) другой воркер прочитал бы из базы
+устаревшую сессию, поэтому такая настройка отклоняется.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth import (BACKEND_SESSION_KEY, HASH_SESSION_KEY,
+                                 SESSION_KEY)
+from django.contrib.sessions.backends import cached_db
+
+from yatube import cache_backends
+
+KEY_PREFIX = 'yatube.sessions'
+AUTH_KEYS = (SESSION_KEY, BACKEND_SESSION_KEY, HASH_SESSION_KEY)
+
+
+def auth_data(session):
+    return tuple(session.get(key) for key in AUTH_KEYS)
+
+
+class SessionStore(cached_db.SessionStore):
+    cache_key_prefix = KEY_PREFIX
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        self._cache = cache_backends.shared(settings.SESSION_CACHE_ALIAS,
+                                            'сессии')
+
+    @property
+    def saved_at_key(self):
+        return f'{self.cache_key}:saved_at'
+
+    def load(self):
+        data = super().load()
+        self._stored_auth = auth_data(data)
+        return data
+
+    def save(self, must_create=False):
+        if (must_create or self.session_key is None
+                or self._auth_changed() or self._stored_is_stale()):
+            super().save(must_create=must_create)
+            self._cache.set(self.saved_at_key, time.time(),
+                            self.get_expiry_age())
+            self._stored_auth = auth_data(self._session)
+            return
+        self._cache.set(self.cache_key, self._session,
+                        self.get_expiry_age())
+
+    def delete(self, session_key=None):
+        super().delete(session_key)
+        self._cache.delete(
+            f'{self.cache_key_prefix}{session_key or self.session_key}'
+            ':saved_at')
+
+    def _auth_changed(self):
+        return getattr(self, '_stored_auth', None) != auth_data(self._session)
+
+    def _stored_is_stale(self):
+        saved_at = self._cache.get(self.saved_at_key)
+        return (saved_at is None
+                or time.time() - saved_at >= settings.SESSION_WRITE_BEHIND)
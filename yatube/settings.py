@@ -4,7 +4,7 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 SECRET_KEY = '8u#f3_a#%k7yp%vuy-@lig7ncdk)l==fdbiyj02-p*fme@=to='
 
-DEBUG = True
+DEBUG = os.environ.get('YATUBE_DEBUG', '1') == '1'
 
 ALLOWED_HOSTS = [
     "localhost",
@@ -16,6 +16,7 @@ ALLOWED_HOSTS = [
 INSTALLED_APPS = [
     'posts',
     'users',
+    'api',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -26,6 +27,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'posts.instrumentation.RequestStatsMiddleware',
+    'yatube.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -38,12 +41,22 @@ MIDDLEWARE = [
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
+# Без DEBUG шаблоны компилируются один раз на процесс и берутся из кэша
+# загрузчика; в разработке читаются заново, чтобы правки были видны сразу.
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if not DEBUG:
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         "DIRS": [TEMPLATES_DIR],
-        "APP_DIRS": True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -57,10 +70,27 @@ TEMPLATES = [
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 
+# YATUBE_DB — sqlite (по умолчанию, файл db.sqlite3 в режиме WAL),
+# postgresql или mysql; YATUBE_DB_NAME, YATUBE_DB_USER, YATUBE_DB_PASSWORD,
+# YATUBE_DB_HOST, YATUBE_DB_PORT — параметры подключения;
+# YATUBE_DB_CONN_MAX_AGE — сколько секунд держать подключение открытым.
+DB_ENGINES = {
+    'sqlite': 'yatube.db_backends.sqlite3',
+    'postgresql': 'django.db.backends.postgresql',
+    'mysql': 'django.db.backends.mysql',
+}
+DB_ENGINE = os.environ.get('YATUBE_DB', 'sqlite')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'ENGINE': DB_ENGINES[DB_ENGINE],
+        'NAME': os.environ.get('YATUBE_DB_NAME',
+                               os.path.join(BASE_DIR, 'db.sqlite3')),
+        'USER': os.environ.get('YATUBE_DB_USER', ''),
+        'PASSWORD': os.environ.get('YATUBE_DB_PASSWORD', ''),
+        'HOST': os.environ.get('YATUBE_DB_HOST', ''),
+        'PORT': os.environ.get('YATUBE_DB_PORT', ''),
+        'CONN_MAX_AGE': int(os.environ.get('YATUBE_DB_CONN_MAX_AGE', 60)),
     }
 }
 
@@ -81,12 +111,70 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Кэш выбирается переменными окружения:
+# YATUBE_CACHE — sqlite (по умолчанию) или file, общие для всех воркеров на
+# машине; lru (в памяти процесса с пределом в байтах) и locmem для default
+# не подходят: версии страниц, подписки и сессии должны видеть все
+# процессы, и код откажется работать с таким кэшем;
+# YATUBE_CACHE_LOCATION — файл базы для sqlite или каталог для file;
+# YATUBE_CACHE_MAX_BYTES — предел памяти для lru.
+CACHE_ENGINES = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'lru': 'yatube.cache_backends.LRUCache',
+    'sqlite': 'yatube.cache_backends.SQLiteCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+}
+CACHE_LOCATIONS = {
+    'sqlite': os.path.join(BASE_DIR, 'cache', 'cache.sqlite3'),
+    'file': os.path.join(BASE_DIR, 'cache', 'files'),
+}
+CACHE_ENGINE = os.environ.get('YATUBE_CACHE', 'sqlite')
+
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': CACHE_ENGINES[CACHE_ENGINE],
+        'LOCATION': os.environ.get('YATUBE_CACHE_LOCATION',
+                                   CACHE_LOCATIONS.get(CACHE_ENGINE, '')),
+        'OPTIONS': {
+            'MAX_BYTES': int(os.environ.get('YATUBE_CACHE_MAX_BYTES',
+                                            64 * 1024 * 1024)),
+        },
     }
 }
 
+# Сессии выбираются переменной окружения YATUBE_SESSIONS:
+# cached_db (по умолчанию) — чтение из кэша, запись в базу отложена на
+# SESSION_WRITE_BEHIND секунд, кроме входа и выхода (yatube.sessions), кэш
+# SESSION_CACHE_ALIAS должен быть общим для процессов;
+# signed_cookies — вся сессия в подписанной cookie, база не нужна;
+# db — каждый запрос читает таблицу django_session.
+# Просроченные сессии удаляет manage.py purge_sessions.
+SESSION_ENGINES = {
+    'cached_db': 'yatube.sessions',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+    'db': 'django.contrib.sessions.backends.db',
+}
+SESSION_ENGINE = SESSION_ENGINES[os.environ.get('YATUBE_SESSIONS',
+                                                'cached_db')]
+SESSION_CACHE_ALIAS = 'default'
+SESSION_WRITE_BEHIND = 60 * 5
+
+# Замеры запросов (posts.instrumentation) копятся в отдельном кэше, общем
+# для всех процессов на машине: manage.py request_report запускается в
+# своём процессе и должен видеть замеры веб-воркеров. Кэш в памяти процесса
+# (lru, locmem) для этого не подходит — middleware откажется запускаться.
+CACHES['request_stats'] = {
+    'BACKEND': 'yatube.cache_backends.SQLiteCache',
+    'LOCATION': os.environ.get(
+        'YATUBE_REQUEST_STATS_LOCATION',
+        os.path.join(BASE_DIR, 'cache', 'request_stats.sqlite3')),
+}
+REQUEST_STATS_CACHE = 'request_stats'
+
+# Сколько живут закэшированные страницы лент и постов; устаревание
+# обеспечивают версии в posts.cache, а не срок жизни
+VIEW_CACHE_TIMEOUT = 60 * 5
+
 LANGUAGE_CODE = 'ru'
 
 TIME_ZONE = 'UTC'
@@ -101,7 +189,18 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 STATIC_URL = '/static/'
-STATIC_ROOT = os.path.join(BASE_DIR, 'static')
+# Исходники статики (bootstrap, jquery) кладутся в static/ — в репозитории
+# их нет, каталог подключается, только если он существует. manage.py
+# collectstatic собирает их вместе со статикой приложений в STATIC_ROOT.
+# Без DEBUG имена собранных файлов содержат хэш содержимого, рядом лежат
+# .gz и .br копии, а отдаёт их само приложение (yatube.static_views) с
+# кэшированием на год.
+STATICFILES_DIRS = [path for path in [os.path.join(BASE_DIR, 'static')]
+                    if os.path.isdir(path)]
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+if not DEBUG:
+    STATICFILES_STORAGE = (
+        'yatube.storage.CompressedManifestStaticFilesStorage')
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
@@ -110,5 +209,41 @@ LOGIN_URL = "/auth/login/"
 LOGIN_REDIRECT_URL = "index"
 LOGOUT_REDIRECT_URL = "index"
 
+# Загружаемые картинки постов уменьшаются до IMAGE_MAX_SIZE и
+# перекодируются в IMAGE_FORMAT (WEBP, JPEG или PNG) с качеством
+# IMAGE_QUALITY; картинки больше IMAGE_MAX_PIXELS пикселей отклоняются.
+IMAGE_MAX_SIZE = (2048, 2048)
+IMAGE_FORMAT = 'WEBP'
+IMAGE_QUALITY = 80
+IMAGE_MAX_PIXELS = 50 * 10 ** 6
+
+# Миниатюры картинок постов: имя размера -> (геометрия, опции sorl).
+# Создаются фоновой задачей при сохранении поста.
+THUMBNAIL_SIZES = {
+    'feed': ('960x339', {'crop': 'center', 'upscale': True}),
+}
+
+# Очередь фоновых задач (posts.jobs, воркер manage.py run_jobs).
+# JOBS_EAGER — выполнять задачи сразу при постановке, без воркера;
+# упавшая задача повторяется через JOB_RETRY_DELAY * 2**(попытка - 1) с,
+# задача дольше JOB_TIMEOUT с в работе считается брошенной воркером.
+JOBS_EAGER = os.environ.get('YATUBE_JOBS_EAGER') == '1'
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_DELAY = 10
+JOB_TIMEOUT = 60 * 10
+
+# Сколько последних постов автора попадает в ленту при подписке
+TIMELINE_BACKFILL_SIZE = 100
+
 EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
+
+# Адрес сайта для ссылок в письмах.
+SITE_URL = os.environ.get('YATUBE_SITE_URL', 'http://localhost:8000')
+
+# Дайджесты новых постов (manage.py send_digests, запускается по cron):
+# писем на одно подключение к почте, постов в письме и посты старше скольких
+# секунд в письмо не попадают (первая рассылка, старые посты при подписке).
+DIGEST_BATCH_SIZE = 100
+DIGEST_MAX_POSTS = 20
+DIGEST_MAX_AGE = 60 * 60 * 24
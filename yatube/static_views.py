@@ -0,0 +1,75 @@
+"""Раздача собранной статики из приложения без DEBUG.
+
+Файлы с хэшем в имени неизменяемы, поэтому кэшируются браузером на год
+с ``immutable`` и повторно не запрашиваются. Если клиент принимает
+brotli или gzip и ``collectstatic`` сохранил сжатую копию, отдаётся она.
+"""
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+from yatube.compression import accepted_encodings
+
+# Предпочтительные сжатия — в начале.
+ENCODINGS = [('br', 'br'), ('gzip', 'gz')]
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+# Имена без хэша могут указывать на новое содержимое после деплоя.
+MUTABLE_MAX_AGE = 60
+
+
+def hashed_names():
+    """Имена файлов с хэшем из манифеста текущего хранилища."""
+    names = getattr(staticfiles_storage, '_yatube_hashed_names', None)
+    if names is None:
+        hashed_files = getattr(staticfiles_storage, 'hashed_files', {})
+        names = frozenset(hashed_files.values())
+        staticfiles_storage._yatube_hashed_names = names
+    return names
+
+
+@require_safe
+def serve(request, path):
+    try:
+        full_path = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    encoding = None
+    accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    for coding, extension in ENCODINGS:
+        if coding in accepted and os.path.isfile(f'{full_path}.{extension}'):
+            encoding = coding
+            full_path = f'{full_path}.{extension}'
+            break
+
+    stat = os.stat(full_path)
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'),
+                              stat.st_mtime, stat.st_size):
+        response = HttpResponseNotModified()
+    else:
+        content_type = (mimetypes.guess_type(path)[0]
+                        or 'application/octet-stream')
+        response = FileResponse(open(full_path, 'rb'),
+                                content_type=content_type)
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        if encoding:
+            response['Content-Encoding'] = encoding
+
+    patch_vary_headers(response, ['Accept-Encoding'])
+    if path in hashed_names():
+        patch_cache_control(response, public=True, immutable=True,
+                            max_age=IMMUTABLE_MAX_AGE)
+    else:
+        patch_cache_control(response, public=True, max_age=MUTABLE_MAX_AGE)
+    return response
@@ -0,0 +1,76 @@
+"""Хранилище статики для продакшена.
+
+``collectstatic`` добавляет в имена файлов хэш содержимого (как
+``ManifestStaticFilesStorage``) и кладёт рядом сжатые копии ``.gz`` и,
+если установлен пакет ``brotli``, ``.br``. Отдаёт их ``yatube.static_views``.
+
+Файл, которого нет в манифесте (например, не положенный в static/
+bootstrap), не роняет страницу: ``{% static %}`` вернёт имя без хэша, а
+на сам файл браузер получит 404, как и без хэширования.
+"""
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.map', '.svg', '.json', '.txt', '.html',
+                '.xml', '.ico', '.eot', '.ttf', '.otf')
+# Файлы меньше MIN_SIZE байт и копии, сжатые хуже чем до MAX_RATIO от
+# оригинала, не сохраняются: выигрыша не будет.
+MIN_SIZE = 256
+MAX_RATIO = 0.9
+
+
+def compressors():
+    yield 'gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0)
+    if brotli is not None:
+        yield 'br', lambda data: brotli.compress(data, quality=11)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Файла нет ни в манифесте, ни в STATIC_ROOT.
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        processed = []
+        for name, hashed_name, result in super().post_process(
+                paths, dry_run, **options):
+            yield name, hashed_name, result
+            if hashed_name and not isinstance(result, Exception):
+                processed.append(hashed_name)
+        if dry_run:
+            return
+        # Оригиналы без хэша тоже сжимаем: на них могут ссылаться напрямую.
+        for name in {*paths, *processed}:
+            for compressed in self.compress(name):
+                yield name, compressed, True
+
+    def compress(self, name):
+        if not name.endswith(COMPRESSIBLE):
+            return
+        path = self.path(name)
+        with open(path, 'rb') as source:
+            data = source.read()
+        if len(data) < MIN_SIZE:
+            return
+        for extension, compress in compressors():
+            compressed = compress(data)
+            target = f'{path}.{extension}'
+            if len(compressed) > len(data) * MAX_RATIO:
+                if os.path.exists(target):
+                    os.remove(target)
+                continue
+            with open(target, 'wb') as output:
+                output.write(compressed)
+            yield f'{name}.{extension}'
@@ -0,0 +1,387 @@
+import gzip
+import os
+import shutil
+import tempfile
+import threading
+from unittest import mock
+
+import brotli
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY, get_user_model
+from django.contrib.sessions.models import Session
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.http import Http404
+from django.test import (RequestFactory, SimpleTestCase, TestCase,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import cache as posts_cache
+from posts.models import Post
+from yatube import cache_backends, compression, static_views
+from yatube.cache_backends import LRUCache, SQLiteCache
+from yatube.sessions import SessionStore
+
+User = get_user_model()
+
+
+class LRUCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = LRUCache('lru-tests', {'OPTIONS': {'MAX_BYTES': 1000}})
+        self.cache.clear()
+
+    def test_evicts_least_recently_used(self):
+        """При переполнении вытесняется давно не читанное значение"""
+        self.cache.set('first', 'x' * 300)
+        self.cache.set('second', 'x' * 300)
+        self.cache.get('first')
+        self.cache.set('third', 'x' * 300)
+        self.cache.set('fourth', 'x' * 300)
+        self.assertIsNotNone(self.cache.get('first'))
+        self.assertIsNone(self.cache.get('second'))
+        self.assertLessEqual(self.cache._size[0], 1000)
+
+    def test_oversized_value_is_not_stored(self):
+        """Значение больше предела не кэшируется"""
+        self.cache.set('big', 'x' * 2000)
+        self.assertIsNone(self.cache.get('big'))
+
+    def test_incr_keeps_value_type(self):
+        """incr работает как у остальных бэкендов"""
+        self.cache.set('counter', 1, None)
+        self.assertEqual(self.cache.incr('counter'), 2)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache.sqlite3')
+        self.cache = SQLiteCache(self.path, {})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_values_are_shared_between_instances(self):
+        """Второй экземпляр (другой процесс) видит те же значения"""
+        self.cache.set('key', {'value': 1})
+        other = SQLiteCache(self.path, {})
+        self.assertEqual(other.get('key'), {'value': 1})
+        self.assertEqual(other.get_many(['key', 'missing']),
+                         {'key': {'value': 1}})
+
+    def test_add_incr_and_expiry(self):
+        """add не перезаписывает, incr атомарен, просроченное не видно"""
+        self.assertTrue(self.cache.add('counter', 1, None))
+        self.assertFalse(self.cache.add('counter', 5))
+        self.assertEqual(self.cache.incr('counter', 2), 3)
+        self.cache.set('old', 'value', -1)
+        self.assertIsNone(self.cache.get('old'))
+        self.assertTrue(self.cache.add('old', 'new'))
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+
+class SQLiteBackendTests(SimpleTestCase):
+    ALIAS = 'sqlite-backend-tests'
+    THREADS = 8
+    WRITES = 200
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        # Отдельная файловая база: у тестовой базы в памяти нет WAL.
+        connections.databases[self.ALIAS] = {
+            'ENGINE': 'yatube.db_backends.sqlite3',
+            'NAME': os.path.join(self.directory, 'db.sqlite3'),
+        }
+
+    def tearDown(self):
+        connections[self.ALIAS].close()
+        del connections[self.ALIAS]
+        del connections.databases[self.ALIAS]
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_pragmas(self):
+        """Подключение включает WAL и ожидание занятой базы"""
+        with connections[self.ALIAS].cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+
+    def test_concurrent_writers(self):
+        """Параллельные транзакции «прочитал — записал» не падают с locked"""
+        with connections[self.ALIAS].cursor() as cursor:
+            cursor.execute(
+                'CREATE TABLE counter (id INTEGER PRIMARY KEY, value INT)')
+        errors = []
+
+        def writer():
+            # У каждого потока своё подключение к той же базе.
+            connection = connections[self.ALIAS]
+            try:
+                for _ in range(self.WRITES):
+                    with transaction.atomic(using=self.ALIAS), \
+                            connection.cursor() as cursor:
+                        cursor.execute('SELECT COUNT(*) FROM counter')
+                        value = cursor.fetchone()[0]
+                        cursor.execute(
+                            'INSERT INTO counter (value) VALUES (%s)',
+                            [value])
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=writer)
+                   for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        with connections[self.ALIAS].cursor() as cursor:
+            cursor.execute('SELECT COUNT(*), COUNT(DISTINCT value) '
+                           'FROM counter')
+            total, distinct = cursor.fetchone()
+        self.assertEqual(total, self.THREADS * self.WRITES)
+        # Каждая транзакция видела все предыдущие: значения не повторяются.
+        self.assertEqual(distinct, total)
+
+
+@override_settings(
+    STATICFILES_STORAGE='yatube.storage.CompressedManifestStaticFilesStorage')
+class StaticPipelineTests(SimpleTestCase):
+    STYLE = 'body { background: url("logo.png"); color: #333; }\n' * 50
+
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.source)
+        self.addCleanup(shutil.rmtree, self.root)
+        os.makedirs(os.path.join(self.source, 'css'))
+        with open(os.path.join(self.source, 'css', 'site.css'), 'w') as f:
+            f.write(self.STYLE)
+        with open(os.path.join(self.source, 'css', 'logo.png'), 'wb') as f:
+            f.write(b'\x89PNG' + os.urandom(500))
+
+        settings = self.settings(STATICFILES_DIRS=[self.source],
+                                 STATIC_ROOT=self.root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        self.hashed = staticfiles_storage.stored_name('css/site.css')
+        self.factory = RequestFactory()
+
+    def get(self, path, **headers):
+        return static_views.serve(self.factory.get('/static/' + path,
+                                                   **headers), path)
+
+    def test_build_writes_hashed_and_compressed_files(self):
+        """collectstatic хэширует имена и сохраняет сжатые копии"""
+        self.assertRegex(self.hashed, r'^css/site\.[0-9a-f]{12}\.css$')
+        path = os.path.join(self.root, self.hashed)
+        with open(path + '.gz', 'rb') as f:
+            self.assertEqual(gzip.decompress(f.read()).decode(),
+                             staticfiles_storage.open(self.hashed)
+                             .read().decode())
+        with open(path + '.br', 'rb') as f:
+            self.assertIn(b'logo.', brotli.decompress(f.read()))
+        # Картинки не сжимаются повторно.
+        logo = staticfiles_storage.stored_name('css/logo.png')
+        self.assertFalse(os.path.exists(
+            os.path.join(self.root, logo + '.gz')))
+
+    def test_hashed_file_is_immutable_and_negotiated(self):
+        """Файл с хэшем кэшируется на год и отдаётся сжатым"""
+        response = self.get(self.hashed, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        body = b''.join(response.streaming_content)
+        self.assertIn(b'logo.', brotli.decompress(body))
+
+        response = self.get(self.hashed,
+                            HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        response.close()
+        response = self.get(self.hashed)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        response.close()
+
+    def test_unhashed_name_and_conditional_request(self):
+        """Имя без хэша кэшируется ненадолго, повторный запрос — 304"""
+        response = self.get('css/site.css')
+        self.assertNotIn('immutable', response['Cache-Control'])
+        response.close()
+        response = self.get(
+            'css/site.css',
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_and_outside_files(self):
+        """Файлы вне STATIC_ROOT не отдаются"""
+        for path in ('css/missing.css', '../' + os.path.basename(
+                self.source) + '/css/site.css'):
+            with self.assertRaises(Http404):
+                self.get(path)
+
+    def test_unknown_file_keeps_its_name(self):
+        """Ссылка на несобранный файл не роняет страницу"""
+        self.assertEqual(
+            staticfiles_storage.url('bootstrap/dist/css/bootstrap.min.css'),
+            '/static/bootstrap/dist/css/bootstrap.min.css')
+
+
+class CompressionMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create_user(username='author')
+        for i in range(5):
+            Post.objects.create(text=f'Пост {i} ' * 20, author=author)
+
+    def test_negotiates_encoding(self):
+        """Ответ сжимается кодировкой, которую принимает клиент"""
+        plain = self.client.get(reverse('index'))
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        response = self.client.get(reverse('index'),
+                                   HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), plain.content)
+        self.assertEqual(int(response['Content-Length']),
+                         len(response.content))
+
+        response = self.client.get(reverse('index'),
+                                   HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    def test_cached_page_is_compressed_once(self):
+        """Страница из кэша представлений не сжимается повторно"""
+        with mock.patch('yatube.compression.compress',
+                        wraps=compression.compress) as compress:
+            first = self.client.get(reverse('index'),
+                                    HTTP_ACCEPT_ENCODING='br')
+            second = self.client.get(reverse('index'),
+                                     HTTP_ACCEPT_ENCODING='br')
+        self.assertEqual(compress.call_count, 1)
+        self.assertEqual(first.content, second.content)
+
+    def test_authenticated_pages_are_compressed_on_the_fly(self):
+        """Страницы пользователя сжимаются при каждом запросе"""
+        self.client.force_login(User.objects.get(username='author'))
+        with mock.patch('yatube.compression.compress',
+                        wraps=compression.compress) as compress:
+            for _ in range(2):
+                response = self.client.get(reverse('index'),
+                                           HTTP_ACCEPT_ENCODING='gzip')
+                self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(compress.call_count, 2)
+
+    def test_etag_becomes_weak(self):
+        """ETag сжатого ответа слабый и подходит для If-None-Match"""
+        response = self.client.get(reverse('api:index'),
+                                   HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        response = self.client.get(reverse('api:index'),
+                                   HTTP_ACCEPT_ENCODING='gzip',
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+
+class SessionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='reader')
+
+    def stored(self, session_key):
+        return Session.objects.get(session_key=session_key).get_decoded()
+
+    def test_authenticated_requests_skip_session_table(self):
+        """Сессия вошедшего пользователя читается из кэша"""
+        self.client.force_login(self.user)
+        session_key = self.client.cookies[settings.SESSION_COOKIE_NAME].value
+        self.assertEqual(self.stored(session_key)[SESSION_KEY],
+                         str(self.user.pk))
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse('follow_index'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([query for query in captured
+                          if 'django_session' in query['sql']])
+
+    def test_changes_are_written_behind(self):
+        """Изменения без входа и выхода пишутся в базу с задержкой"""
+        session = SessionStore()
+        session['theme'] = 'light'
+        session.save()
+
+        session = SessionStore(session.session_key)
+        session['theme'] = 'dark'
+        session.save()
+        self.assertEqual(self.stored(session.session_key)['theme'], 'light')
+        self.assertEqual(SessionStore(session.session_key)['theme'], 'dark')
+
+        with override_settings(SESSION_WRITE_BEHIND=0):
+            session = SessionStore(session.session_key)
+            session['theme'] = 'blue'
+            session.save()
+        self.assertEqual(self.stored(session.session_key)['theme'], 'blue')
+
+    def test_login_is_written_immediately(self):
+        """Вход сохраняется в базу сразу и виден без кэша"""
+        session = SessionStore()
+        session['theme'] = 'light'
+        session.save()
+
+        session = SessionStore(session.session_key)
+        session[SESSION_KEY] = str(self.user.pk)
+        session.save()
+        cache.clear()
+        self.assertEqual(SessionStore(session.session_key)[SESSION_KEY],
+                         str(self.user.pk))
+
+    @override_settings(CACHES={
+        **settings.CACHES,
+        'local': {'BACKEND': 'yatube.cache_backends.LRUCache'},
+    }, SESSION_CACHE_ALIAS='local')
+    def test_process_local_cache_is_rejected(self):
+        """Сессии не хранятся в кэше одного процесса"""
+        with self.assertRaises(ImproperlyConfigured):
+            SessionStore()
+
+    @override_settings(
+        SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+    def test_signed_cookies(self):
+        """С подписанными cookie сессии не попадают в базу"""
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse('follow_index'))
+        self.assertEqual(response.context['user'], self.user)
+        self.assertFalse([query for query in captured
+                          if 'django_session' in query['sql']])
+        self.assertFalse(Session.objects.exists())
+
+
+class SharedCacheTests(SimpleTestCase):
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'yatube.cache_backends.LRUCache'}})
+    def test_process_local_default_is_rejected(self):
+        """Версии страниц не хранятся в кэше одного процесса"""
+        with self.assertRaises(ImproperlyConfigured):
+            posts_cache.bump(posts_cache.index_scope())
+
+    def test_default_cache_is_shared(self):
+        """По умолчанию кэш общий для всех процессов"""
+        self.assertIsInstance(cache_backends.shared('default', 'тест'),
+                              SQLiteCache)
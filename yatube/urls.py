@@ -2,7 +2,9 @@ from django.conf import settings
 from django.conf.urls import handler404, handler500
 from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from yatube import static_views
 
 handler404 = 'posts.views.page_not_found'  # noqa
 handler500 = 'posts.views.server_error'  # noqa  
@@ -11,11 +13,15 @@ urlpatterns = [
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
     path('admin/', admin.site.urls),
+    path('api/v1/', include('api.urls', namespace='api')),
     path('', include('posts.urls')),
 ]
 
 if settings.DEBUG:
+    # Статику в разработке отдаёт runserver из django.contrib.staticfiles.
     urlpatterns += static(settings.MEDIA_URL,
-                          ocument_root=settings.MEDIA_ROOT)
-    urlpatterns += static(settings.STATIC_URL,
-                          document_root=settings.STATIC_ROOT)
+                          document_root=settings.MEDIA_ROOT)
+else:
+    urlpatterns.insert(0, re_path(
+        r'^{}(?P<path>.+)$'.format(settings.STATIC_URL.lstrip('/')),
+        static_views.serve, name='static'))